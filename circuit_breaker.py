@@ -0,0 +1,78 @@
+import time
+from collections import deque
+from typing import Callable
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker for one remote endpoint.
+
+    Outcomes of the last `window` calls are kept; once at least `min_calls`
+    are recorded and the failure ratio reaches `failure_ratio`, the circuit
+    opens for `open_seconds`. After that a single half-open probe is let
+    through: success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, name: str, *, window: int = 20, min_calls: int = 4,
+                 failure_ratio: float = 0.5, open_seconds: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self.outcomes = deque(maxlen=window)  # True = success
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def failure_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def blocked(self) -> bool:
+        """Read-only check: True if `allow()` would certainly refuse."""
+        if self.state == OPEN:
+            return self.clock() - self.opened_at < self.open_seconds
+        return self.state == HALF_OPEN and self.probe_in_flight
+
+    def allow(self) -> bool:
+        """True if a call may be attempted right now."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if self.clock() - self.opened_at < self.open_seconds:
+                return False
+            self.state = HALF_OPEN
+            self.probe_in_flight = False
+        # half-open: exactly one probe at a time
+        if self.probe_in_flight:
+            return False
+        self.probe_in_flight = True
+        return True
+
+    def record_success(self):
+        if self.state == HALF_OPEN:
+            self.outcomes.clear()
+            self.state = CLOSED
+            self.probe_in_flight = False
+            print(f"[Breaker/{self.name}] probe ok -> closed")
+        self.outcomes.append(True)
+
+    def record_failure(self):
+        self.outcomes.append(False)
+        if self.state == HALF_OPEN:
+            self._trip()
+            return
+        if len(self.outcomes) >= self.min_calls and self.failure_rate() >= self.failure_ratio:
+            self._trip()
+
+    def _trip(self):
+        self.state = OPEN
+        self.opened_at = self.clock()
+        self.probe_in_flight = False
+        print(f"[Breaker/{self.name}] open for {self.open_seconds:.0f}s (failure rate {self.failure_rate():.0%})")
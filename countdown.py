@@ -0,0 +1,131 @@
+import asyncio
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import discord
+
+# Per-channel message-edit scheduler for live countdowns.
+#
+# Every tracked message has a render() callback returning (text, done). Once per
+# window the channel's loop renders all of its messages, skips the ones whose
+# text hasn't changed (so many ticks collapse into one edit), and spends at most
+# `budget` edits on the rest, finals first, then the stalest. Slow or 429'd
+# edits halve the budget and stretch the window; clean windows slowly restore
+# them.
+
+Render = Callable[[], Tuple[str, bool]]
+
+SLOW_EDIT_SECONDS = 1.5  # an edit taking longer than this means discord.py waited out a rate limit
+RECOVER_AFTER_WINDOWS = 6
+
+
+class _Entry:
+    __slots__ = ("message", "render", "last_text", "last_edit")
+
+    def __init__(self, message: discord.Message, render: Render, text: str):
+        self.message = message
+        self.render = render
+        self.last_text = text
+        self.last_edit = time.monotonic()
+
+
+class _Channel:
+    __slots__ = ("entries", "budget", "window", "clean_windows", "task")
+
+    def __init__(self, budget: int, window: float):
+        self.entries: Dict[int, _Entry] = {}
+        self.budget = budget
+        self.window = window
+        self.clean_windows = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+class ChannelEditScheduler:
+    def __init__(self, *, budget: int = 4, window: float = 5.0, max_window: float = 30.0):
+        self.base_budget = budget
+        self.base_window = window
+        self.max_window = max_window
+        self._channels: Dict[int, _Channel] = {}
+        self.edits = 0
+        self.skipped = 0       # renders coalesced away (text unchanged)
+        self.backoffs = 0
+
+    def track(self, message: discord.Message, render: Render):
+        """Start keeping `message` in sync with render(); its current content counts as rendered."""
+        ch = self._channels.get(message.channel.id)
+        if ch is None:
+            ch = self._channels[message.channel.id] = _Channel(self.base_budget, self.base_window)
+        ch.entries[message.id] = _Entry(message, render, message.content)
+        if ch.task is None or ch.task.done():
+            ch.task = asyncio.create_task(self._run(message.channel.id, ch))
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._channels),
+            "tracked": sum(len(c.entries) for c in self._channels.values()),
+            "edits": self.edits, "skipped": self.skipped, "backoffs": self.backoffs,
+        }
+
+    async def _run(self, channel_id: int, ch: _Channel):
+        try:
+            while ch.entries:
+                started = time.monotonic()
+                await self._window(ch)
+                await asyncio.sleep(max(0.0, ch.window - (time.monotonic() - started)))
+        finally:
+            if self._channels.get(channel_id) is ch and not ch.entries:
+                del self._channels[channel_id]
+
+    async def _window(self, ch: _Channel):
+        pending = []
+        for msg_id, entry in list(ch.entries.items()):
+            try:
+                text, done = entry.render()
+            except Exception as e:
+                print("[Countdown] render failed:", e)
+                del ch.entries[msg_id]
+                continue
+            if text == entry.last_text:
+                self.skipped += 1
+                if done:
+                    del ch.entries[msg_id]
+                continue
+            pending.append((not done, entry.last_edit, msg_id, entry, text, done))
+        pending.sort(key=lambda p: (p[0], p[1]))
+
+        pressured = False
+        for _, _, msg_id, entry, text, done in pending[:ch.budget]:
+            t0 = time.monotonic()
+            try:
+                await entry.message.edit(content=text)
+            except discord.NotFound:
+                ch.entries.pop(msg_id, None)
+                continue
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    pressured = True
+                    break
+                print("[Countdown] edit failed:", e)
+                ch.entries.pop(msg_id, None)
+                continue
+            self.edits += 1
+            entry.last_text, entry.last_edit = text, time.monotonic()
+            if done:
+                ch.entries.pop(msg_id, None)
+            if entry.last_edit - t0 > SLOW_EDIT_SECONDS:
+                pressured = True
+                break
+        self._adapt(ch, pressured)
+
+    def _adapt(self, ch: _Channel, pressured: bool):
+        if pressured:
+            self.backoffs += 1
+            ch.clean_windows = 0
+            ch.budget = max(1, ch.budget // 2)
+            ch.window = min(self.max_window, ch.window * 2)
+            return
+        ch.clean_windows += 1
+        if ch.clean_windows >= RECOVER_AFTER_WINDOWS:
+            ch.clean_windows = 0
+            ch.budget = min(self.base_budget, ch.budget + 1)
+            ch.window = max(self.base_window, ch.window / 2)
@@ -1,113 +1,105 @@
 import os
-import random
 import asyncio
 import time
-from collections import deque
 import discord
 from discord.ext import commands
+from rate_limit import TokenBucketLimiter
+from circuit_breaker import CircuitBreaker
+from countdown import ChannelEditScheduler
+from game_engine import P4_FAIL_XP_PENALTY, GameEngine, time_limit
+from hints import local_hint, word_meta
+from profiler import SamplingProfiler, timed
+from word_packs import (
+    DEFAULT_PACK, WordPack, WordPackError, available_packs, load_guild_packs, load_pack, save_guild_packs,
+)
 
 # --- Bot Setup ---
 intents = discord.Intents.default()
 intents.message_content = True
 bot = commands.Bot(command_prefix="\\", intents=intents, help_command=None, case_insensitive=True)
 
+# --- Game engine (sessions, word lock, perk & scoring rules; no Discord inside) ---
+ENGINE = GameEngine()
+
 # --- Sessions (per user) ---
-active_sessions = {}
+active_sessions = ENGINE.sessions
 
 # Simple per-user cooldown to prevent start spam
 LAST_SHELL_START = {}
 START_COOLDOWN_SEC = 5  # user must wait this many seconds between starting hacks
 
+# --- Token-bucket rate limits (capacity, refill tokens/sec) ---
+# "cmd" is charged once for every command (bot + LevelsCog).
+# "llm" is charged for every Subnet relay call (\subnet, RCE hints, perk lines).
+RATE_LIMITS = {
+    "cmd": {"user": (6, 0.5), "guild": (40, 5.0)},
+    "llm": {"user": (3, 0.1), "guild": (12, 0.5)},
+}
+RATE_LIMITER = TokenBucketLimiter(RATE_LIMITS)
+
+# (scope, id) -> monotonic time until which no further throttle notice is sent
+_THROTTLE_NOTICE_UNTIL = {}
+
+class RateLimited(commands.CheckFailure):
+    def __init__(self, retry_after: float, scope: str):
+        super().__init__(f"Rate limited ({scope}); retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+        self.scope = scope
+
+# --- On-demand profiler (\profile start|stop) ---
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+PROFILE_DEFAULT_SECONDS = 30
+PROFILE_MAX_SECONDS = 300
+PROFILE_TOP_N = 8
+_profiler = None        # current/last SamplingProfiler
+_profile_stop_task = None
+
 # --- Global active-word lock: only 1 puzzle per word at a time ---
-ACTIVE_WORDS = set()
-
-# --- Word pools (Star Citizen themed, single-token only) ---
-# Easier: short/common ships, places, gameplay nouns (100 items)
-EASY_WORDS = [
-    # 1-25
-    "aurora","mustang","avenger","cutlass","gladius","sabre","hornet","talon","hawk","corsair",
-    "nomad","titan","pisces","vulture","mule","argo","aegis","anvil","origin","drake",
-    "misc","rsi","crusader","tumbril","greycat",
-    # 26-50
-    "arccorp","hurston","lorville","orison","grimhex","yela","daymar","cellin","lyria","wala",
-    "calliope","clio","euterpe","arial","aberdeen","magda","ita","stanton","terra","pyro",
-    "salvage","mining","cargo","bunker","outpost",
-    # 51-75
-    "hangar","quantum","jump","mobiglas","comms","tressler","baijini","everus","olisar","refinery",
-    "scrap","racing","cave","beacon","patrol","escort","skimmer","shubin","kiosk","trade",
-    "courier","runner","mercury","msr","carrack",
-    # 76-100
-    "constellation","freelancer","prospector","mole","hercules","valkyrie","arrow","prowler","reclaimer","buccaneer",
-    "scorpius","phoenix","aquila","taurus","andromeda","apollo","polaris","perseus","nautilus","liberator",
-    "kraken","javelin","idris","hammerhead","eclipse",
-]
-
-# Harder: longer names/places/systems but still “friendly” (100 items)
-HARD_WORDS = [
-    # 1-25
-    "caterpillar","starfarer","retaliator","harbinger","glaive","starlifter","genesis","pioneer",
-    "endeavor","idris","hammerhead","scorpius","microtech","newbabbage","area18","lorville","platform","baijinipoint",
-    "porttressler","grimhex","portolisar","refinery","hurston","ursa",
-    # 26-50
-    "crusader","mining","covalex","terminal","office","banshee","kareah","jumptown","outpost",
-    "hydroponic","scrapyard","blacksite","datavault","commarray","quantumtravel","beacon","commlink","signal","harvest",
-    "cavern","armistice","interdiction","contraband","newdeal",
-    # 51-75
-    "teasa","astroarmada","cubbyblast","dumpersdepot","apex","orison","lorville","clouds",
-    "icefield","glacier","gravlev","quantumdrive","generator","powerplant","cooler","hardpoint","marker","waypoint",
-    "overclock","underclock","firmware","trace","infiltration",
-    # 76-100
-    "exfiltration","decryption","encryption","synchronization","configuration","virtualization","fragmentation","exploitation","reconnaissance",
-    "surveillance","transponder","starchart","protocols","failsafe","tracker","satnetwork","voidspace","starlancer","ironclad","starforge","overwatch",
-]
-
-# Ensure exactly 100 each (pad with safe placeholders if needed)
-def _pad_to(words, n, pad_token):
-    if len(words) >= n:
-        return words[:n]
-    extra = [f"{pad_token}{i}" for i in range(1, n - len(words) + 1)]
-    return words + extra
-
-EASY_WORDS = _pad_to(EASY_WORDS, 100, "easyfill")
-HARD_WORDS = _pad_to(HARD_WORDS, 100, "hardfill")
-
-# --- No-repeat shuffled queues ---
-def _make_queue(words):
-    return deque(random.sample(words, len(words)))
-
-EASY_QUEUE = _make_queue(EASY_WORDS)
-HARD_QUEUE = _make_queue(HARD_WORDS)
-
-def _next_available(queue, full_list):
-    """Pop until we find a word not currently active. If all are active, return None."""
-    if not queue:
-        # reshuffle a fresh rotation
-        queue.extend(random.sample(full_list, len(full_list)))
-    tried = 0
-    total = len(queue)
-    while tried < total:
-        w = queue.popleft()
-        if w not in ACTIVE_WORDS:
-            return w
-        queue.append(w)
-        tried += 1
-    return None  # all locked
-
-def next_easy():
-    return _next_available(EASY_QUEUE, EASY_WORDS)
-
-def next_hard():
-    return _next_available(HARD_QUEUE, HARD_WORDS)
-
-# --- Timers (swapped per your change) ---
-EASY_TIME = 90     # 1.5 minutes
-HARD_TIME = 180    # 3 minutes
+ACTIVE_WORDS = ENGINE.active_words
+
+# --- Word packs (loaded from wordpacks/<name>.txt, selectable per guild) ---
+# Each WordPack carries its own word lists, hint index and rotation queues.
+# Reloads build a complete new WordPack off the event loop and swap the dict
+# entry in one assignment; live sessions keep their answer strings untouched.
+WORD_PACKS = {DEFAULT_PACK: load_pack(DEFAULT_PACK)}
+GUILD_PACKS = load_guild_packs()  # guild_id -> pack name
+for _name in set(GUILD_PACKS.values()) - set(WORD_PACKS):
+    try:
+        WORD_PACKS[_name] = load_pack(_name)
+    except WordPackError as e:
+        print("❌ Word pack not loaded:", e)
+_pack_reload_lock = asyncio.Lock()
+
+def pack_for(guild_id):
+    name = GUILD_PACKS.get(guild_id, DEFAULT_PACK) if guild_id is not None else DEFAULT_PACK
+    return WORD_PACKS.get(name) or WORD_PACKS[DEFAULT_PACK]
+
+async def reload_pack(name: str) -> WordPack:
+    """Rebuild a pack in a worker thread, then swap it in. Raises WordPackError if invalid."""
+    async with _pack_reload_lock:
+        pack = await asyncio.to_thread(load_pack, name)
+        WORD_PACKS[name] = pack
+        return pack
+
+# --- No-repeat shuffled queues (per pack) ---
+def next_easy(guild_id=None):
+    pack = pack_for(guild_id)
+    return ENGINE.next_word(pack.easy_queue, pack.easy)
+
+def next_hard(guild_id=None):
+    pack = pack_for(guild_id)
+    return ENGINE.next_word(pack.hard_queue, pack.hard)
+
+# --- Live countdown on the puzzle message ---
+LIVE_COUNTDOWN = True     # set False to keep the static "⏳ 90 seconds" line
+COUNTDOWN_EDITS = ChannelEditScheduler(budget=4, window=5.0)  # ≤4 edits per channel per 5s, shared by all hacks there
 
 # --- Optional LLM (OpenAI) ---
 try:
-    from openai import OpenAI
+    from openai import APITimeoutError, OpenAI
     OPENAI_OK = True
 except Exception:
+    APITimeoutError = asyncio.TimeoutError
     OPENAI_OK = False
 
 _ai_client = None
@@ -121,80 +113,140 @@ SYSTEM_PROMPT = (
 def have_openai():
     return OPENAI_OK and bool(os.getenv("OPENAI_API_KEY"))
 
+# --- Subnet relay circuit breakers (one per endpoint) ---
+SUBNET_CALL_TIMEOUT = 6.0  # seconds per endpoint attempt
+SUBNET_TOTAL_DEADLINE = 7.0  # seconds per subnet_reply, fallback included
+SUBNET_MIN_ATTEMPT = 1.0  # don't start a fallback attempt with less time than this left
+SUBNET_BREAKERS = {
+    "responses": CircuitBreaker("responses", open_seconds=30.0),
+    "chat": CircuitBreaker("chat", open_seconds=30.0),
+}
+_subnet_preferred = "responses"  # last endpoint that answered; tried first
+
 def get_ai_client():
     global _ai_client
     if _ai_client is None:
-        _ai_client = OpenAI()
+        # Hard client-side deadline; retries are handled by the breaker/fallback below.
+        _ai_client = OpenAI(timeout=SUBNET_CALL_TIMEOUT, max_retries=0)
     return _ai_client
 
-async def ai_say_subnet(prompt_text: str) -> str:
-    """Subnet replies in SC RP voice. Uses Responses API first, falls back to Chat Completions."""
+def _subnet_responses(client, prompt_text: str) -> str:
+    resp = client.responses.create(
+        model="gpt-4o-mini",
+        instructions=SYSTEM_PROMPT,
+        input=prompt_text,
+        max_output_tokens=80,
+    )
+    text = getattr(resp, "output_text", "") or ""
+    return text.strip()
+
+def _subnet_chat(client, prompt_text: str) -> str:
+    resp = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user",   "content": prompt_text},
+        ],
+        max_completion_tokens=80,
+    )
+    content = ""
+    if resp and getattr(resp, "choices", None):
+        msg = resp.choices[0].message if len(resp.choices) > 0 else None
+        if msg and getattr(msg, "content", None):
+            content = (msg.content or "").strip()
+    return content
+
+SUBNET_ENDPOINTS = {"responses": _subnet_responses, "chat": _subnet_chat}
+
+def llm_allowed(ctx) -> bool:
+    """Charge the caller's LLM budget; False means skip the relay call."""
+    if ctx is None:
+        return True
+    guild_id = ctx.guild.id if ctx.guild else None
+    ok, _, _ = RATE_LIMITER.try_acquire("llm", ctx.author.id, guild_id)
+    return ok
+
+# Relay status lines shown when Subnet has no real reply
+SUBNET_OFFLINE_LINE = "🛰️ [Subnet AI link offline]"
+SUBNET_SATURATED_LINE = "🛰️ [Subnet relay saturated — stand by]"
+SUBNET_NO_TELEMETRY_LINE = "🛰️ Subnet online. (No telemetry returned from relay.)"
+
+@timed
+async def subnet_reply(prompt_text: str, ctx=None):
+    """Ask the relay. Returns (text, status_line): text is None whenever we fell back,
+    and status_line then says why (offline / saturated / no telemetry).
+    Tries the last healthy endpoint first (Responses or Chat Completions), each behind its
+    own circuit breaker, all within SUBNET_TOTAL_DEADLINE. The other endpoint is only tried
+    after a fast error: a timeout means the relay is slow and a second call would just add
+    its latency. When `ctx` is given the call is charged against that user's/guild's LLM budget."""
+    global _subnet_preferred
     if not have_openai():
-        return "🛰️ [Subnet AI link offline]"
+        return None, SUBNET_OFFLINE_LINE
+    if all(b.blocked() for b in SUBNET_BREAKERS.values()):
+        return None, SUBNET_OFFLINE_LINE
+    if not llm_allowed(ctx):
+        return None, SUBNET_SATURATED_LINE
     client = get_ai_client()
 
-    # Try Responses API
-    try:
-        resp = client.responses.create(
-            model="gpt-4o-mini",
-            instructions=SYSTEM_PROMPT,
-            input=prompt_text,
-            max_output_tokens=80,
-        )
-        text = getattr(resp, "output_text", "") or ""
-        text = text.strip()
+    deadline = time.monotonic() + SUBNET_TOTAL_DEADLINE
+    order = [_subnet_preferred] + [n for n in SUBNET_ENDPOINTS if n != _subnet_preferred]
+    for name in order:
+        budget = min(SUBNET_CALL_TIMEOUT, deadline - time.monotonic())
+        if budget < SUBNET_MIN_ATTEMPT:
+            break
+        breaker = SUBNET_BREAKERS[name]
+        if not breaker.allow():
+            continue
+        try:
+            text = await asyncio.wait_for(
+                asyncio.to_thread(SUBNET_ENDPOINTS[name], client, prompt_text),
+                timeout=budget,
+            )
+        except asyncio.CancelledError:
+            breaker.probe_in_flight = False
+            raise
+        except (asyncio.TimeoutError, APITimeoutError) as e:
+            breaker.record_failure()
+            print(f"[Subnet/{name} TIMEOUT]", repr(e))
+            break
+        except Exception as e:
+            breaker.record_failure()
+            print(f"[Subnet/{name} ERROR]", repr(e))
+            continue
+        breaker.record_success()
+        _subnet_preferred = name
         if text:
-            print("[Subnet/Responses] ->", text)
-            return text
-    except Exception as e:
-        print("[Subnet/Responses ERROR]", e)
-
-    # Fallback to Chat Completions
-    try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user",   "content": prompt_text},
-            ],
-            max_completion_tokens=80,
-        )
-        content = ""
-        if resp and getattr(resp, "choices", None):
-            msg = resp.choices[0].message if len(resp.choices) > 0 else None
-            if msg and getattr(msg, "content", None):
-                content = (msg.content or "").strip()
-        if content:
-            print("[Subnet/ChatCompletions] ->", content)
-            return content
-    except Exception as e:
-        print("[Subnet/ChatCompletions ERROR]", e)
-
-    return "🛰️ Subnet online. (No telemetry returned from relay.)"
-
-async def ai_hint_sc(scramble: str, attempts_left: int) -> str:
-    if not have_openai():
-        return ""
+            print(f"[Subnet/{name}] ->", text)
+            return text, ""
+
+    if all(b.blocked() for b in SUBNET_BREAKERS.values()):
+        return None, SUBNET_OFFLINE_LINE
+    return None, SUBNET_NO_TELEMETRY_LINE
+
+async def ai_say_subnet(prompt_text: str, ctx=None) -> str:
+    """Subnet replies in SC RP voice; falls back to a relay status line."""
+    text, status = await subnet_reply(prompt_text, ctx=ctx)
+    return text or status
+
+# Set True to have Subnet re-voice the local hint (costs an LLM call per wrong guess)
+HINT_LLM_FLAVOR = False
+
+async def wrong_guess_hint(answer: str, scramble: str, attempts_left: int, ctx=None) -> str:
+    """Local hint from precomputed word metadata; optionally re-voiced by Subnet."""
+    pack = pack_for(ctx.guild.id if ctx and ctx.guild else None)
+    meta = pack.meta.get(answer.lower()) or word_meta(answer)
+    hint = local_hint(meta, attempts_left)
+    if not (HINT_LLM_FLAVOR and have_openai()):
+        return hint
     prompt = (
-        "Provide a single-sentence, non-spoiler hint to help a pilot unscramble a word. "
-        f"Scramble: {scramble}. Attempts left: {attempts_left}. "
-        "Do NOT reveal the answer. Voice: Subnet, SC ops AI."
+        "Rephrase this hint as one short sentence to help a pilot unscramble a word. "
+        f"Hint: {hint} Scramble: {scramble}. Attempts left: {attempts_left}. "
+        "Keep every fact in the hint. Do NOT reveal the answer. Voice: Subnet, SC ops AI."
     )
-    return await ai_say_subnet(prompt)
+    text, _ = await subnet_reply(prompt, ctx=ctx)
+    return text or hint
 
 # --- Utility helpers ---
-def scramble_word(word: str) -> str:
-    """Shuffle letters, ensuring >1 letter moves positions for a non-trivial scramble."""
-    letters = list(word)
-    for _ in range(20):
-        random.shuffle(letters)
-        mixed = "".join(letters)
-        if mixed != word:
-            diffs = sum(1 for a, b in zip(mixed, word) if a != b)
-            if diffs >= min(2, len(word)):
-                return mixed
-    return "".join(letters) if "".join(letters) != word else word[::-1]
-
 async def cancel_timer(task):
     if task and not task.done():
         task.cancel()
@@ -207,16 +259,37 @@ async def timeout_watcher(ctx, user_id):
     """Checks per-user hack deadline every second; times out when now >= deadline."""
     while True:
         await asyncio.sleep(1)
-        session = active_sessions.get(user_id)
-        if not session or not session.get("scramble"):
-            return
-        deadline = session.get("deadline")
-        if not deadline:
+        expired = ENGINE.timed_out(user_id)
+        if expired is None:
             return
-        if time.monotonic() >= deadline:
+        if expired:
             await end_current_hack(ctx, user_id, timed_out=True)
             return
 
+def _format_left(seconds: float) -> str:
+    # coarse steps so most ticks render identical text and need no edit
+    step = 10 if seconds > 30 else 5
+    left = int(-(-seconds // step) * step)
+    if left >= 60:
+        return f"{left // 60}m {left % 60:02d}s"
+    return f"{left}s"
+
+def start_countdown(msg, user_id, session, head):
+    """Keep the puzzle message's timer line live (follows \\p2 deadline changes)."""
+    if not LIVE_COUNTDOWN or msg is None:
+        return
+    started_at = session.get("started_at")
+    tail = "⚡ `\\RCE <answer>`"
+
+    def render():
+        current = active_sessions.get(user_id)
+        if current is not session or session.get("started_at") != started_at or not session.get("deadline"):
+            return f"{head}\n⌛ Window closed", True
+        left = ENGINE.time_left(session)
+        return f"{head}\n⏳ {_format_left(left)} left\n{tail}", False
+
+    COUNTDOWN_EDITS.track(msg, render)
+
 def requester_line(ctx, session):
     alias = session.get("alias")
     if alias:
@@ -232,37 +305,24 @@ async def end_current_hack(ctx, user_id, timed_out=False, failed=False, success=
     if not session:
         return
 
-    revealed_answer = session.get("answer")
-    difficulty = session.get("difficulty")
-    started_at = session.get("started_at")
-    answer_word = session.get("answer")
-
-    # stop task and CLEAR all session fields (include perk/timer stuff)
+    # stop task and CLEAR all session fields (include perk/timer stuff); engine releases the word lock
     await cancel_timer(session.get("task"))
-
-    # release the active word lock
-    if answer_word in ACTIVE_WORDS:
-        ACTIVE_WORDS.discard(answer_word)
-
-    session.update({
-        "scramble": None, "answer": None, "tries": 0, "task": None,
-        "difficulty": None, "started_at": None,
-        "perk_limit": 1, "perks_used": 0, "revealed_indices": set(), "deadline": None
-    })
+    session["task"] = None
+    outcome = "success" if success else "timeout" if timed_out else "fail" if failed else "abort"
+    done = ENGINE.finish(user_id, outcome)
+    if done is None:
+        return
+    revealed_answer = done.word
+    await record_attempt(ctx.author, done)
 
     if success:
         await ctx.send("✅ **Hack successful — access granted** // ATC uplink synced. Clearance updated on mobiGlas.")
-        elapsed_sec = None
-        if started_at is not None:
-            elapsed_sec = max(0.0, time.monotonic() - started_at)
-
         levels = bot.get_cog("LevelsCog")
         if levels:
-            fallback = EASY_TIME if difficulty == "easy" else HARD_TIME
-            duration = elapsed_sec if (elapsed_sec is not None) else float(fallback)
+            duration = done.elapsed_sec if (done.elapsed_sec is not None) else float(time_limit(done.difficulty))
             state, applied, leveled, note = await levels.record_hack_success(
                 ctx.author,
-                difficulty=difficulty or "easy",
+                difficulty=done.difficulty,
                 duration_sec=float(duration)
             )
             if applied > 0:
@@ -280,15 +340,26 @@ async def end_current_hack(ctx, user_id, timed_out=False, failed=False, success=
             msg += f"\n🧩 **Answer revealed:** `{revealed_answer}`"
         await ctx.send(msg)
 
-async def end_full_session(channel, user_id, alias_text="Session terminated"):
-    session = active_sessions.pop(user_id, None)
+async def end_full_session(channel, user_id, alias_text="Session terminated", member=None):
+    session, done = ENGINE.logout(user_id)  # releases the word lock if a hack was running
     if session:
         await cancel_timer(session.get("task"))
-        # release lock if any
-        if session.get("answer") in ACTIVE_WORDS:
-            ACTIVE_WORDS.discard(session.get("answer"))
+        # logging off mid-hack counts as an abort
+        if member is not None and done is not None:
+            await record_attempt(member, done)
     await channel.send(f"⚡ {alias_text}")
 
+async def record_attempt(member, done):
+    """Hand a finished hack (from ENGINE.finish/logout) to LevelsCog's attempt log."""
+    levels = bot.get_cog("LevelsCog")
+    if not levels or getattr(member, "guild", None) is None:
+        return
+    try:
+        await levels.record_attempt(member, word=done.word, difficulty=done.difficulty, outcome=done.outcome,
+                                    elapsed_sec=done.elapsed_sec, perks_used=done.perks_used)
+    except Exception as e:
+        print("[Attempts ERROR]", e)
+
 # --- Events ---
 @bot.event
 async def on_ready():
@@ -311,12 +382,20 @@ async def on_message(message: discord.Message):
     parts = stripped.split()
     if len(parts) >= 2:
         alias, key = parts[0], parts[1].lower()
+        if key in ("online", "offline"):
+            # login/logout are not bot commands, so charge the "cmd" bucket here
+            guild = message.guild
+            ok, retry, scope = RATE_LIMITER.try_acquire("cmd", message.author.id, guild.id if guild else None)
+            if not ok:
+                await send_throttle_notice(message.channel, message.author, guild, retry, scope)
+                return
         if key == "online":
-            active_sessions[message.author.id] = {
-                "alias": alias, "scramble": None, "answer": None,
-                "tries": 0, "task": None, "difficulty": None, "started_at": None,
-                "perk_limit": 1, "perks_used": 0, "revealed_indices": set(), "deadline": None
-            }
+            old = active_sessions.get(message.author.id)
+            if old:
+                await cancel_timer(old.get("task"))
+            _, replaced = ENGINE.login(message.author.id, alias)
+            if replaced is not None:
+                await record_attempt(message.author, replaced)
             await message.channel.send(f"💻 {alias} logged in. Use `\\shell 01` or `\\shell 02`.")
 
             levels = bot.get_cog("LevelsCog")
@@ -329,10 +408,49 @@ async def on_message(message: discord.Message):
             return
 
         if key == "offline":
-            await end_full_session(message.channel, message.author.id, "Session terminated")
+            await end_full_session(message.channel, message.author.id, "Session terminated", member=message.author)
             return
     await bot.process_commands(message)
 
+# --- Global rate-limit check (applies to every command, including LevelsCog) ---
+@bot.check
+async def rate_limit_check(ctx: commands.Context):
+    guild_id = ctx.guild.id if ctx.guild else None
+    ok, retry, scope = RATE_LIMITER.try_acquire("cmd", ctx.author.id, guild_id)
+    if not ok:
+        raise RateLimited(retry, scope)
+    return True
+
+@bot.before_invoke
+async def profile_before_invoke(ctx: commands.Context):
+    if _profiler and _profiler.running:
+        _profiler.command_started(id(ctx), ctx.command.qualified_name)
+
+@bot.after_invoke
+async def profile_after_invoke(ctx: commands.Context):
+    if _profiler and _profiler.running:
+        _profiler.command_finished(id(ctx))
+
+async def send_throttle_notice(channel, author, guild, retry_after: float, scope: str):
+    """At most one notice per throttled user/guild until its bucket has a token again."""
+    key = ("guild", guild.id) if scope == "guild" and guild else ("user", author.id)
+    now = time.monotonic()
+    if _THROTTLE_NOTICE_UNTIL.get(key, 0.0) > now:
+        return
+    if len(_THROTTLE_NOTICE_UNTIL) > 1000:
+        for k in [k for k, until in _THROTTLE_NOTICE_UNTIL.items() if until <= now]:
+            del _THROTTLE_NOTICE_UNTIL[k]
+    _THROTTLE_NOTICE_UNTIL[key] = now + retry_after
+    who = "this server" if scope == "guild" else author.mention
+    await channel.send(f"⏳ Comm-relay throttled for {who}. Retry in {max(1, int(retry_after + 0.999))}s.", delete_after=5)
+
+@bot.event
+async def on_command_error(ctx: commands.Context, error):
+    if isinstance(error, RateLimited):
+        await send_throttle_notice(ctx.channel, ctx.author, ctx.guild, error.retry_after, error.scope)
+        return
+    await commands.Bot.on_command_error(bot, ctx, error)
+
 # --- Commands ---
 @bot.command(name="shell")
 async def shell_cmd(ctx: commands.Context, *, arg: str = None):
@@ -354,52 +472,24 @@ async def shell_cmd(ctx: commands.Context, *, arg: str = None):
     LAST_SHELL_START[user_id] = now
 
     key = arg.strip().lower()
-    if key == "01":
-        word = next_easy()
-        if word is None:
-            return await ctx.send("⚠️ All EASY puzzles are currently in use. Try again in a moment.")
-        scramble = scramble_word(word)
-        await cancel_timer(session.get("task"))
-
-        # set perk limit based on current level (L4 gets 2; others 1)
+    if key in ("01", "02"):
+        difficulty = "easy" if key == "01" else "hard"
+        # perk limit follows the current level (L4 gets 2; others 1)
         level = await get_user_level(ctx.author)
-        perk_limit = 2 if level >= 4 else 1
-
-        session.update({
-            "scramble": scramble, "answer": word, "tries": 3, "difficulty": "easy",
-            "started_at": time.monotonic(),
-            "perk_limit": perk_limit, "perks_used": 0, "revealed_indices": set(),
-            "deadline": time.monotonic() + EASY_TIME
-        })
-        ACTIVE_WORDS.add(word)
-        session["task"] = asyncio.create_task(timeout_watcher(ctx, user_id))
-        await ctx.send(
-            f"💻 **RCE (EASY)**\n{requester_line(ctx, session)}\n"
-            f"🔐 Unscramble: `{scramble}`\n⏳ 90 seconds\n⚡ `\\RCE <answer>`"
-        )
-
-    elif key == "02":
-        word = next_hard()
+        guild_id = ctx.guild.id if ctx.guild else None
+        word = next_easy(guild_id) if difficulty == "easy" else next_hard(guild_id)
         if word is None:
-            return await ctx.send("⚠️ All HARD puzzles are currently in use. Try again in a moment.")
-        scramble = scramble_word(word)
+            return await ctx.send(f"⚠️ All {difficulty.upper()} puzzles are currently in use. Try again in a moment.")
         await cancel_timer(session.get("task"))
 
-        level = await get_user_level(ctx.author)
-        perk_limit = 2 if level >= 4 else 1
-
-        session.update({
-            "scramble": scramble, "answer": word, "tries": 3, "difficulty": "hard",
-            "started_at": time.monotonic(),
-            "perk_limit": perk_limit, "perks_used": 0, "revealed_indices": set(),
-            "deadline": time.monotonic() + HARD_TIME
-        })
-        ACTIVE_WORDS.add(word)
+        _, replaced = ENGINE.start_hack(user_id, word, difficulty, level)
+        if replaced is not None:
+            await record_attempt(ctx.author, replaced)
         session["task"] = asyncio.create_task(timeout_watcher(ctx, user_id))
-        await ctx.send(
-            f"💻 **RCE (HARD)**\n{requester_line(ctx, session)}\n"
-            f"🔐 Unscramble: `{scramble}`\n⏳ 3 minutes\n⚡ `\\RCE <answer>`"
-        )
+        window = "90 seconds" if difficulty == "easy" else "3 minutes"
+        head = f"💻 **RCE ({difficulty.upper()})**\n{requester_line(ctx, session)}\n🔐 Unscramble: `{session['scramble']}`"
+        msg = await ctx.send(f"{head}\n⏳ {window}\n⚡ `\\RCE <answer>`")
+        start_countdown(msg, user_id, session, head)
 
     elif key == "end":
         if session.get("scramble"):
@@ -424,15 +514,14 @@ async def rce_cmd(ctx: commands.Context, *, answer: str = None):
         await ctx.send("⚠️ Usage: `\\RCE <answer>`")
         return
 
-    if answer.strip().lower() == (session["answer"] or "").lower():
+    result = ENGINE.guess(user_id, answer)
+    if result == "success":
         await end_current_hack(ctx, user_id, success=True)
+    elif result == "wrong":
+        hint = await wrong_guess_hint(session["answer"], session["scramble"], session["tries"], ctx=ctx)
+        await ctx.send(f"❌ Wrong. Attempts left: {session['tries']}\n💡 {hint or ''}")
     else:
-        session["tries"] -= 1
-        if session["tries"] > 0:
-            hint = await ai_hint_sc(session["scramble"], session["tries"])
-            await ctx.send(f"❌ Wrong. Attempts left: {session['tries']}\n💡 {hint or ''}")
-        else:
-            await end_current_hack(ctx, user_id, failed=True)
+        await end_current_hack(ctx, user_id, failed=True)
 
 @bot.command(name="clear")
 async def clear_cmd(ctx: commands.Context, *, arg: str = None):
@@ -450,11 +539,100 @@ async def subnet_cmd(ctx, *, message: str = None):
     if not message:
         await ctx.send("⚠️ Usage: `\\subnet <message>`")
         return
-    line = await ai_say_subnet(message)
+    line = await ai_say_subnet(message, ctx=ctx)
     if not line.strip():
         line = "🛰️ Subnet link active. (No content received.)"
     await ctx.send(line)
 
+@commands.has_guild_permissions(administrator=True)
+@bot.command(name="ratelimit")
+async def ratelimit_cmd(ctx: commands.Context):
+    st = RATE_LIMITER.stats()
+    rej = ", ".join(f"{k}: {v}" for k, v in st["rejections"].items()) or "none"
+    ok = ", ".join(f"{k}: {v}" for k, v in sorted(st["allowed"].items())) or "none"
+    cd = COUNTDOWN_EDITS.stats()
+    await ctx.send(
+        f"🚦 **Rate limiter**\nTracked buckets: {st['tracked_buckets']}\n"
+        f"Allowed → {ok}\nRejected → {rej}\n"
+        f"⏳ Countdown edits → {cd['edits']} sent, {cd['skipped']} coalesced, {cd['backoffs']} backoffs "
+        f"({cd['tracked']} live in {cd['channels']} channels)"
+    )
+
+@commands.has_guild_permissions(administrator=True)
+@bot.command(name="wordpack")
+async def wordpack_cmd(ctx: commands.Context, action: str = "list", name: str = None):
+    action = action.lower()
+    current = pack_for(ctx.guild.id).name
+    if action == "list":
+        names = available_packs()
+        lines = []
+        for n in names:
+            pack = WORD_PACKS.get(n)
+            size = f"{len(pack.easy)} easy / {len(pack.hard)} hard" if pack else "not loaded"
+            mark = " ← active" if n == current else ""
+            lines.append(f"• `{n}` — {size}{mark}")
+        return await ctx.send("📦 **Word packs**\n" + ("\n".join(lines) or "none found"))
+    if action == "use":
+        if not name:
+            return await ctx.send("Usage: `\\wordpack use <name>`")
+        try:
+            pack = WORD_PACKS.get(name) or await reload_pack(name)
+        except WordPackError as e:
+            return await ctx.send(f"❌ {e}")
+        GUILD_PACKS[ctx.guild.id] = pack.name
+        await asyncio.to_thread(save_guild_packs, dict(GUILD_PACKS))
+        return await ctx.send(f"✅ This server now uses pack `{pack.name}` ({len(pack.easy)} easy / {len(pack.hard)} hard).")
+    if action == "reload":
+        targets = [name] if name else sorted(set(WORD_PACKS) | {current})
+        lines = []
+        for n in targets:
+            try:
+                pack = await reload_pack(n)
+                lines.append(f"✅ `{n}` — {len(pack.easy)} easy / {len(pack.hard)} hard")
+            except WordPackError as e:
+                lines.append(f"❌ `{n}` kept previous version — {e}")
+        return await ctx.send("♻️ **Word packs reloaded**\n" + "\n".join(lines))
+    await ctx.send("Usage: `\\wordpack list`, `\\wordpack use <name>`, `\\wordpack reload [name]`")
+
+async def _finish_profile(channel):
+    prof = _profiler
+    await asyncio.to_thread(prof.stop)
+    path = os.path.join(PROFILE_DIR, f"profile-{int(time.time())}.collapsed")
+    await asyncio.to_thread(prof.write_collapsed, path)
+    summary = prof.summary(PROFILE_TOP_N)
+    if len(summary) > 1800:
+        summary = summary[:1800] + "\n…"
+    print(f"[Profiler] wrote {path}\n{summary}")
+    await channel.send(f"🔬 **Profile complete** → `{os.path.basename(path)}`\n```\n{summary}\n```", file=discord.File(path))
+
+async def _profile_auto_stop(channel, seconds: int):
+    await asyncio.sleep(seconds)
+    try:
+        await _finish_profile(channel)
+    except Exception as e:
+        print("[Profiler] auto-stop failed:", e)
+
+@commands.has_guild_permissions(administrator=True)
+@bot.command(name="profile")
+async def profile_cmd(ctx: commands.Context, action: str = "start", seconds: int = PROFILE_DEFAULT_SECONDS):
+    global _profiler, _profile_stop_task
+    action = action.lower()
+    if action == "start":
+        if _profiler and _profiler.running:
+            return await ctx.send("⚠️ Profiler already running. Use `\\profile stop`.")
+        seconds = max(1, min(PROFILE_MAX_SECONDS, int(seconds)))
+        _profiler = SamplingProfiler()
+        _profiler.start()
+        _profile_stop_task = asyncio.create_task(_profile_auto_stop(ctx.channel, seconds))
+        return await ctx.send(f"🔬 Profiling for up to **{seconds}s**. `\\profile stop` to finish early.")
+    if action == "stop":
+        if not (_profiler and _profiler.running):
+            return await ctx.send("ℹ️ Profiler is not running.")
+        await cancel_timer(_profile_stop_task)
+        _profile_stop_task = None
+        return await _finish_profile(ctx.channel)
+    await ctx.send("Usage: `\\profile start [seconds]` or `\\profile stop`")
+
 # ---------- Perk helpers & commands ----------
 
 async def get_user_level(member: discord.Member) -> int:
@@ -468,28 +646,33 @@ async def get_user_level(member: discord.Member) -> int:
     except Exception:
         return 0
 
-def _ensure_active(ctx):
-    user_id = ctx.author.id
-    session = active_sessions.get(user_id)
-    if not session:
-        return None, "⚠️ No active session."
-    if not session.get("scramble"):
-        return None, "⚠️ No active hack."
-    return session, None
-
-def _perks_remaining(session):
-    limit = int(session.get("perk_limit", 1))
-    used = int(session.get("perks_used", 0))
-    return max(0, limit - used)
-
-async def _mark_perk_used(ctx, session, note: str):
-    session["perks_used"] = int(session.get("perks_used", 0)) + 1
-    line = await ai_say_subnet(note) if have_openai() else ""
+PERK_ERRORS = {
+    "no_session": "⚠️ No active session.",
+    "no_hack": "⚠️ No active hack.",
+    "no_perks": "⚡ No perks remaining for this hack.",
+    "nothing": "ℹ️ Nothing to reveal.",
+    "no_timer": "ℹ️ No active timer.",
+}
+
+def _perk_error(res, perk: str) -> str:
+    if res.reason == "locked":
+        return f"🔒 Perk locked. Reach **Level {res.need}** to use `\\{perk}`."
+    if res.reason == "cooldown":
+        mins = int(res.seconds_left // 60)
+        secs = int(res.seconds_left % 60)
+        return f"⏳ `\\{perk}` on cooldown. Try again in **{mins}m {secs}s**."
+    return PERK_ERRORS.get(res.reason, "⚠️ Perk unavailable.")
+
+def _perk_precheck(ctx) -> str:
+    """Session/hack check, done before the level lookup so non-players never touch the DB."""
+    _, reason = ENGINE.active(ctx.author.id)
+    return PERK_ERRORS[reason] if reason else ""
+
+async def _perk_flavor(ctx, note: str):
+    line = await ai_say_subnet(note, ctx=ctx) if have_openai() else ""
     await ctx.send(f"{line or '🛰️ [Subnet]'}")
 
 # ---- Perk gating helpers (p3 daily, p4 XP penalty) ----
-P4_FAIL_XP_PENALTY = 5  # change if you want a different penalty
-
 async def _levels_or_zero():
     return bot.get_cog("LevelsCog")
 
@@ -518,88 +701,59 @@ async def _apply_xp_delta(member: discord.Member, delta: int, note: str = ""):
 
 @bot.command(name="p1")
 async def perk_reveal(ctx: commands.Context):
-    session, err = _ensure_active(ctx)
-    if err: return await ctx.send(err)
-    if _perks_remaining(session) <= 0:
-        return await ctx.send("⚡ No perks remaining for this hack.")
-    # Level check (level 1+)
+    err = _perk_precheck(ctx)
+    if err:
+        return await ctx.send(err)
     level = await get_user_level(ctx.author)
-    if level < 1:
-        return await ctx.send("🔒 Perk locked. Reach **Level 1** to use `\\p1`.")
-    # Reveal 2 distinct indices
-    answer = session["answer"]
-    n = len(answer)
-    idxs = set(session.get("revealed_indices", set()))
-    choices = [i for i in range(n) if i not in idxs]
-    if len(choices) == 0:
-        return await ctx.send("ℹ️ Nothing to reveal.")
-    pick_count = 2 if len(choices) >= 2 else 1
-    pick = random.sample(choices, k=pick_count)
-    idxs.update(pick)
-    session["revealed_indices"] = idxs
-    # Build masked hint
-    hint = "".join(ch if i in idxs else "•" for i, ch in enumerate(answer))
-    await _mark_perk_used(ctx, session, "Releasing partial cipher. Keep pressure on the node.")
-    await ctx.send(f"🧩 **Reveal** → `{hint}`")
+    res = ENGINE.perk_reveal(ctx.author.id, level)
+    if not res.ok:
+        return await ctx.send(_perk_error(res, "p1"))
+    await _perk_flavor(ctx, "Releasing partial cipher. Keep pressure on the node.")
+    await ctx.send(f"🧩 **Reveal** → `{res.hint}`")
 
 @bot.command(name="p2")
 async def perk_pause(ctx: commands.Context):
-    session, err = _ensure_active(ctx)
-    if err: return await ctx.send(err)
-    if _perks_remaining(session) <= 0:
-        return await ctx.send("⚡ No perks remaining for this hack.")
+    err = _perk_precheck(ctx)
+    if err:
+        return await ctx.send(err)
     level = await get_user_level(ctx.author)
-    if level < 2:
-        return await ctx.send("🔒 Perk locked. Reach **Level 2** to use `\\p2`.")
-    # Extend deadline by 10s
-    dl = session.get("deadline")
-    if not dl:
-        return await ctx.send("ℹ️ No active timer.")
-    session["deadline"] = dl + 10.0
-    await _mark_perk_used(ctx, session, "Holding the gate. Window extended ten seconds.")
+    res = ENGINE.perk_stall(ctx.author.id, level)
+    if not res.ok:
+        return await ctx.send(_perk_error(res, "p2"))
+    await _perk_flavor(ctx, "Holding the gate. Window extended ten seconds.")
     await ctx.send("⏱️ **Stall** → +10s added to the clock.")
 
 @bot.command(name="p3")
 async def perk_skip(ctx: commands.Context):
-    session, err = _ensure_active(ctx)
-    if err: return await ctx.send(err)
-    if _perks_remaining(session) <= 0:
-        return await ctx.send("⚡ No perks remaining for this hack.")
+    err = _perk_precheck(ctx)
+    if err:
+        return await ctx.send(err)
     level = await get_user_level(ctx.author)
-    if level < 3:
-        return await ctx.send("🔒 Perk locked. Reach **Level 3** to use `\\p3`.")
-
     allowed, seconds_left = await _p3_allowed(ctx.author)
-    if not allowed:
-        mins = int(seconds_left // 60)
-        secs = int(seconds_left % 60)
-        return await ctx.send(f"⏳ `\\p3` on cooldown. Try again in **{mins}m {secs}s**.")
-
-    await _mark_perk_used(ctx, session, "Bypass injected. ATC uplink green.")
+    res = ENGINE.perk_bypass(ctx.author.id, level, cooldown_left=0.0 if allowed else seconds_left)
+    if not res.ok:
+        return await ctx.send(_perk_error(res, "p3"))
+    await _perk_flavor(ctx, "Bypass injected. ATC uplink green.")
     await _p3_mark_used(ctx.author)
     await end_current_hack(ctx, ctx.author.id, success=True)
 
 @bot.command(name="p4")
 async def perk_autosolve(ctx: commands.Context):
-    session, err = _ensure_active(ctx)
-    if err: return await ctx.send(err)
-    if _perks_remaining(session) <= 0:
-        return await ctx.send("⚡ No perks remaining for this hack.")
+    err = _perk_precheck(ctx)
+    if err:
+        return await ctx.send(err)
     level = await get_user_level(ctx.author)
-    if level < 4:
-        return await ctx.send("🔒 Perk locked. Reach **Level 4** to use `\\p4`.")
-    # Chance formula: base 30% + 10% * level; capped at 70%
-    chance = min(0.30 + 0.10 * level, 0.70)
-    roll = random.random()
+    res = ENGINE.perk_overclock(ctx.author.id, level)
+    if not res.ok:
+        return await ctx.send(_perk_error(res, "p4"))
     await ctx.send("🎲 Running exploit…")
-    if roll <= chance:
-        await _mark_perk_used(ctx, session, "Exploit latched. Solved.")
+    if res.solved:
+        await _perk_flavor(ctx, "Exploit latched. Solved.")
         await end_current_hack(ctx, ctx.author.id, success=True)
     else:
-        # consume a perk even on fail, and apply XP penalty
-        session["perks_used"] = int(session.get("perks_used", 0)) + 1
+        # perk is consumed even on fail; apply XP penalty
         state = await _apply_xp_delta(ctx.author, -P4_FAIL_XP_PENALTY, note="Overclock failed")
-        line = await ai_say_subnet("Exploit rejected. ICE held.") if have_openai() else ""
+        line = await ai_say_subnet("Exploit rejected. ICE held.", ctx=ctx) if have_openai() else ""
         tail = f"\n🩹 **Penalty:** –{P4_FAIL_XP_PENALTY} XP" if state is not None else ""
         await ctx.send(f"{line or '🛰️ [Subnet]'}\n❗ **Overclock failed.** Keep trying.{tail}")
 
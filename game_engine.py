@@ -0,0 +1,351 @@
+import random
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, Optional
+
+# Discord-free game rules. Everything here is synchronous and deterministic
+# given the injected clock and RNG; discord_hack_bot.py and LevelsCog only
+# translate results into messages and database writes.
+
+# --- Timers ---
+EASY_TIME = 90     # 1.5 minutes
+HARD_TIME = 180    # 3 minutes
+MAX_TRIES = 3
+
+# --- Perks ---
+PERK_UNLOCK = {"p1": 1, "p2": 2, "p3": 3, "p4": 4}  # minimum level
+STALL_SECONDS = 10.0
+REVEAL_COUNT = 2
+P4_FAIL_XP_PENALTY = 5
+P3_COOLDOWN_SECONDS = 24 * 60 * 60  # once per day
+
+# --- Scoring ---
+# XP thresholds → levels (0–4): xp required to be >= this to reach that level index
+LEVEL_THRESHOLDS = [0, 50, 150, 300, 600]
+EASY_BASE_XP = 8
+HARD_BASE_XP = 15
+EASY_BEST_SECONDS = 25
+HARD_BEST_SECONDS = 40
+SPEED_BONUS_MAX = 10  # extra XP at best times
+
+OUTCOMES = ("success", "fail", "timeout", "abort")
+
+
+def time_limit(difficulty: str) -> int:
+    return EASY_TIME if difficulty == "easy" else HARD_TIME
+
+
+def perk_limit_for(level: int) -> int:
+    """Level 4 gets 2 perks per hack; everyone else 1."""
+    return 2 if level >= 4 else 1
+
+
+def overclock_chance(level: int) -> float:
+    # base 30% + 10% * level; capped at 70%
+    return min(0.30 + 0.10 * level, 0.70)
+
+
+def level_for_xp(xp: int) -> int:
+    lvl = 0
+    for i, threshold in enumerate(LEVEL_THRESHOLDS):
+        if xp >= threshold:
+            lvl = i
+    return min(lvl, 4)
+
+
+def speed_bonus(difficulty: str, duration_sec: float) -> int:
+    """+SPEED_BONUS_MAX at <= best seconds, linearly down to +0 at 2*best."""
+    best = EASY_BEST_SECONDS if difficulty == "easy" else HARD_BEST_SECONDS
+    if duration_sec > 2 * best:
+        return 0
+    ratio = max(0.0, min(1.0, (2 * best - duration_sec) / best))
+    return int(round(SPEED_BONUS_MAX * ratio))
+
+
+def hack_xp(difficulty: str, duration_sec: float):
+    """XP for a successful hack. Returns (applied, speed_bonus)."""
+    base = EASY_BASE_XP if difficulty == "easy" else HARD_BASE_XP
+    bonus = speed_bonus(difficulty, duration_sec)
+    return base + bonus, bonus
+
+
+def p3_cooldown_left(last_epoch: Optional[float], now_epoch: float) -> float:
+    if last_epoch is None:
+        return 0.0
+    return max(0.0, P3_COOLDOWN_SECONDS - (now_epoch - float(last_epoch)))
+
+
+def perks_remaining(session: dict) -> int:
+    limit = int(session.get("perk_limit", 1))
+    used = int(session.get("perks_used", 0))
+    return max(0, limit - used)
+
+
+def scramble_word(word: str, rng: random.Random) -> str:
+    """Shuffle letters, ensuring >1 letter moves positions for a non-trivial scramble."""
+    letters = list(word)
+    for _ in range(20):
+        rng.shuffle(letters)
+        mixed = "".join(letters)
+        if mixed != word:
+            diffs = sum(1 for a, b in zip(mixed, word) if a != b)
+            if diffs >= min(2, len(word)):
+                return mixed
+    return "".join(letters) if "".join(letters) != word else word[::-1]
+
+
+def _idle_fields() -> dict:
+    return {
+        "scramble": None, "answer": None, "tries": 0,
+        "difficulty": None, "started_at": None,
+        "perk_limit": 1, "perks_used": 0, "revealed_indices": set(), "deadline": None,
+    }
+
+
+def _result(ok: bool, reason: str = "", **extra) -> SimpleNamespace:
+    return SimpleNamespace(ok=ok, reason=reason, **extra)
+
+
+class GameEngine:
+    """Sessions, the global active-word lock, and all per-hack rules.
+
+    Sessions are plain dicts (the bot keeps its own keys, e.g. "task", on
+    them); perk methods return SimpleNamespace(ok, reason, ...) where reason is
+    one of "no_session", "no_hack", "no_perks", "locked", "cooldown",
+    "nothing", "no_timer".
+    """
+
+    def __init__(self, *, clock: Callable[[], float] = time.monotonic, rng: Optional[random.Random] = None):
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.sessions: Dict[int, dict] = {}
+        self.active_words = set()
+
+    # ---------- Sessions ----------
+
+    def login(self, user_id: int, alias: str):
+        """Start a fresh session. Returns (session, replaced) where replaced is the hack
+        abandoned by logging in again mid-hack (finished as "abort"), if any."""
+        old = self.sessions.get(user_id)
+        replaced = self._finish(old, "abort") if old and old.get("answer") else None
+        session = {"alias": alias, "task": None, **_idle_fields()}
+        self.sessions[user_id] = session
+        return session, replaced
+
+    def logout(self, user_id: int):
+        """Drop the session. Returns (session, finished) where finished is the aborted hack, if any."""
+        session = self.sessions.pop(user_id, None)
+        if not session:
+            return None, None
+        finished = self._finish(session, "abort") if session.get("answer") else None
+        return session, finished
+
+    # ---------- Hacks ----------
+
+    def next_word(self, queue, full_list) -> Optional[str]:
+        """Pop until we find a word not currently active. If all are active, return None."""
+        if not queue:
+            # reshuffle a fresh rotation
+            queue.extend(self.rng.sample(full_list, len(full_list)))
+        tried = 0
+        total = len(queue)
+        while tried < total:
+            w = queue.popleft()
+            if w not in self.active_words:
+                return w
+            queue.append(w)
+            tried += 1
+        return None  # all locked
+
+    def start_hack(self, user_id: int, word: str, difficulty: str, level: int):
+        """Returns (session, replaced) where replaced is a still-running hack that this
+        one supersedes (finished as "abort"), if any."""
+        session = self.sessions[user_id]
+        replaced = self._finish(session, "abort") if session.get("answer") else None
+        now = self.clock()
+        session.update({
+            "scramble": scramble_word(word, self.rng), "answer": word, "tries": MAX_TRIES,
+            "difficulty": difficulty, "started_at": now,
+            "perk_limit": perk_limit_for(level), "perks_used": 0, "revealed_indices": set(),
+            "deadline": now + time_limit(difficulty),
+        })
+        self.active_words.add(word)
+        return session, replaced
+
+    def active(self, user_id: int):
+        """(session, reason) — session is None unless a hack is running."""
+        session = self.sessions.get(user_id)
+        if not session:
+            return None, "no_session"
+        if not session.get("scramble"):
+            return None, "no_hack"
+        return session, ""
+
+    def guess(self, user_id: int, answer: str) -> str:
+        """Returns "success", "wrong" (tries left) or "fail" (out of tries). Caller ends the hack."""
+        session = self.sessions[user_id]
+        if answer.strip().lower() == (session["answer"] or "").lower():
+            return "success"
+        session["tries"] -= 1
+        return "wrong" if session["tries"] > 0 else "fail"
+
+    def timed_out(self, user_id: int) -> Optional[bool]:
+        """True once past the deadline; None if there is no running timer anymore."""
+        session = self.sessions.get(user_id)
+        if not session or not session.get("scramble") or not session.get("deadline"):
+            return None
+        return self.clock() >= session["deadline"]
+
+    def time_left(self, session: dict) -> float:
+        return max(0.0, session["deadline"] - self.clock())
+
+    def finish(self, user_id: int, outcome: str) -> Optional[SimpleNamespace]:
+        """End the running hack: release its word lock and reset the session."""
+        session = self.sessions.get(user_id)
+        if not session or not session.get("answer"):
+            return None
+        return self._finish(session, outcome)
+
+    def _finish(self, session: dict, outcome: str) -> SimpleNamespace:
+        if outcome not in OUTCOMES:
+            raise ValueError(f"unknown outcome: {outcome}")
+        word = session.get("answer")
+        started_at = session.get("started_at")
+        done = SimpleNamespace(
+            word=word,
+            difficulty=session.get("difficulty") or "easy",
+            outcome=outcome,
+            elapsed_sec=max(0.0, self.clock() - started_at) if started_at is not None else None,
+            perks_used=int(session.get("perks_used", 0)),
+        )
+        self.active_words.discard(word)
+        session.update(_idle_fields())
+        return done
+
+    # ---------- Perks ----------
+
+    def _perk_gate(self, user_id: int, perk: str, level: int):
+        session, reason = self.active(user_id)
+        if not session:
+            return None, _result(False, reason)
+        if perks_remaining(session) <= 0:
+            return None, _result(False, "no_perks")
+        need = PERK_UNLOCK[perk]
+        if level < need:
+            return None, _result(False, "locked", need=need)
+        return session, None
+
+    @staticmethod
+    def _use_perk(session: dict):
+        session["perks_used"] = int(session.get("perks_used", 0)) + 1
+
+    def perk_reveal(self, user_id: int, level: int) -> SimpleNamespace:
+        """p1: reveal up to REVEAL_COUNT unrevealed letters. `hint` is the masked answer."""
+        session, err = self._perk_gate(user_id, "p1", level)
+        if err:
+            return err
+        answer = session["answer"]
+        idxs = set(session.get("revealed_indices", set()))
+        choices = [i for i in range(len(answer)) if i not in idxs]
+        if not choices:
+            return _result(False, "nothing")
+        idxs.update(self.rng.sample(choices, k=min(REVEAL_COUNT, len(choices))))
+        session["revealed_indices"] = idxs
+        self._use_perk(session)
+        hint = "".join(ch if i in idxs else "•" for i, ch in enumerate(answer))
+        return _result(True, hint=hint)
+
+    def perk_stall(self, user_id: int, level: int) -> SimpleNamespace:
+        """p2: push the deadline back STALL_SECONDS."""
+        session, err = self._perk_gate(user_id, "p2", level)
+        if err:
+            return err
+        if not session.get("deadline"):
+            return _result(False, "no_timer")
+        session["deadline"] += STALL_SECONDS
+        self._use_perk(session)
+        return _result(True, deadline=session["deadline"])
+
+    def perk_bypass(self, user_id: int, level: int, cooldown_left: float = 0.0) -> SimpleNamespace:
+        """p3: consume the perk; caller finishes the hack as a success and records the daily use."""
+        session, err = self._perk_gate(user_id, "p3", level)
+        if err:
+            return err
+        if cooldown_left > 0:
+            return _result(False, "cooldown", seconds_left=cooldown_left)
+        self._use_perk(session)
+        return _result(True)
+
+    def perk_overclock(self, user_id: int, level: int) -> SimpleNamespace:
+        """p4: roll overclock_chance(level). The perk is spent either way; `solved` says which."""
+        session, err = self._perk_gate(user_id, "p4", level)
+        if err:
+            return err
+        self._use_perk(session)
+        return _result(True, solved=self.rng.random() <= overclock_chance(level))
+
+
+def _selfcheck():
+    """Deterministic perk rules: fake clock, seeded RNG."""
+    fake_now = [100.0]
+    engine = GameEngine(clock=lambda: fake_now[0], rng=random.Random(7))
+    engine.login(1, "pilot")
+
+    # p2 pushes the deadline back exactly STALL_SECONDS
+    session, _ = engine.start_hack(1, "gladius", "easy", level=2)
+    assert session["deadline"] == 100.0 + EASY_TIME
+    res = engine.perk_stall(1, 2)
+    assert res.ok and session["deadline"] == 100.0 + EASY_TIME + STALL_SECONDS, res
+    fake_now[0] += EASY_TIME + STALL_SECONDS / 2
+    assert engine.timed_out(1) is False
+    engine.finish(1, "timeout")
+
+    # p4 spends the perk even when the roll fails (Random(0).random() ≈ 0.84 > 0.70)
+    session, _ = engine.start_hack(1, "hornet", "hard", level=4)
+    engine.rng = random.Random(0)
+    res = engine.perk_overclock(1, 4)
+    assert res.ok and res.solved is False and session["perks_used"] == 1, res
+    engine.finish(1, "fail")
+
+    # p1 reports "nothing" once every letter is revealed, without spending a perk
+    session, _ = engine.start_hack(1, "io", "easy", level=4)
+    assert engine.perk_reveal(1, 4).hint == "io"
+    res = engine.perk_reveal(1, 4)
+    assert not res.ok and res.reason == "nothing" and session["perks_used"] == 1, res
+
+    # starting over mid-hack hands back the abandoned one
+    _, replaced = engine.start_hack(1, "aurora", "easy", level=4)
+    assert replaced.word == "io" and replaced.outcome == "abort" and engine.active_words == {"aurora"}
+    print("selfcheck ok")
+
+
+if __name__ == "__main__":
+    _selfcheck()
+
+    # Quick throughput check: simulated hacks with a fake clock and seeded RNG.
+    from collections import deque
+
+    fake_now = [0.0]
+    engine = GameEngine(clock=lambda: fake_now[0], rng=random.Random(1234))
+    words = ["aurora", "gladius", "hornet", "cutlass", "stanton", "hurston", "daymar", "origin"]
+    queue = deque()
+    n_users, rounds = 100, 2000
+    for uid in range(n_users):
+        engine.login(uid, f"pilot{uid}")
+    rng = engine.rng
+    tally = dict.fromkeys(OUTCOMES, 0)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for uid in range(n_users):
+            word = engine.next_word(queue, words)
+            if word is None:
+                continue
+            engine.start_hack(uid, word, "easy", level=rng.randrange(5))
+            if rng.random() < 0.2:
+                engine.perk_reveal(uid, 4)
+            fake_now[0] += rng.random() * 30
+            outcome = engine.guess(uid, word if rng.random() < 0.6 else "nope")
+            tally[engine.finish(uid, "success" if outcome == "success" else "fail").outcome] += 1
+    elapsed = time.perf_counter() - started
+    total = sum(tally.values())
+    print(f"{total} hacks in {elapsed:.2f}s → {total / elapsed:,.0f} hacks/s  {tally}")
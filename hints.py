@@ -0,0 +1,105 @@
+import math
+import re
+from collections import namedtuple
+from typing import Dict, Iterable, Optional
+
+# Local, zero-latency hint engine. Metadata for every word is computed once at
+# load time; a hint is just a few string joins over that record.
+
+# Known categories (anything not listed falls back to "term").
+CATEGORIES = {
+    "ship": {
+        "aurora", "mustang", "avenger", "cutlass", "gladius", "sabre", "hornet", "talon", "hawk", "corsair",
+        "nomad", "titan", "pisces", "vulture", "mule", "mercury", "msr", "carrack", "constellation",
+        "freelancer", "prospector", "mole", "hercules", "valkyrie", "arrow", "prowler", "reclaimer",
+        "buccaneer", "scorpius", "phoenix", "aquila", "taurus", "andromeda", "apollo", "polaris", "perseus",
+        "nautilus", "liberator", "kraken", "javelin", "idris", "hammerhead", "eclipse", "caterpillar",
+        "starfarer", "retaliator", "harbinger", "glaive", "starlifter", "genesis", "pioneer", "endeavor",
+        "banshee", "starlancer", "ironclad",
+    },
+    "manufacturer": {
+        "argo", "aegis", "anvil", "origin", "drake", "misc", "rsi", "tumbril", "greycat", "shubin",
+    },
+    "planet": {"arccorp", "hurston", "microtech", "crusader"},
+    "moon": {
+        "yela", "daymar", "cellin", "lyria", "wala", "calliope", "clio", "euterpe", "arial", "aberdeen",
+        "magda", "ita",
+    },
+    "system": {"stanton", "terra", "pyro"},
+    "location": {
+        "lorville", "orison", "grimhex", "area18", "newbabbage", "olisar", "portolisar", "tressler",
+        "porttressler", "baijini", "baijinipoint", "everus", "kareah", "jumptown", "covalex", "teasa",
+        "astroarmada", "cubbyblast", "dumpersdepot", "newdeal",
+    },
+}
+
+CATEGORY_LABELS = {
+    "ship": "ship hull designation",
+    "manufacturer": "manufacturer brand",
+    "planet": "planet",
+    "moon": "moon",
+    "system": "star system",
+    "location": "landing zone or station",
+    "term": "ops or gameplay term",
+}
+
+WordMeta = namedtuple("WordMeta", "word category length first last syllables vowels")
+
+_WORD_TO_CATEGORY = {w: cat for cat, words in CATEGORIES.items() for w in words}
+_VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+
+
+def count_syllables(word: str) -> int:
+    """Cheap vowel-group estimate; good enough for a hint."""
+    letters = "".join(ch for ch in word.lower() if ch.isalpha())
+    n = len(_VOWEL_GROUPS.findall(letters))
+    if n > 1 and letters.endswith("e") and not letters.endswith(("le", "ee")):
+        n -= 1
+    return max(1, n)
+
+
+def word_meta(word: str, category: Optional[str] = None) -> WordMeta:
+    w = word.lower()
+    return WordMeta(
+        word=w,
+        category=category or _WORD_TO_CATEGORY.get(w, "term"),
+        length=len(w),
+        first=w[:1],
+        last=w[-1:],
+        syllables=count_syllables(w),
+        vowels=sum(1 for ch in w if ch in "aeiou"),
+    )
+
+
+def build_index(words: Iterable[str], categories: Optional[Dict[str, str]] = None) -> Dict[str, WordMeta]:
+    """Precompute hint metadata for every word (duplicates collapse).
+    `categories` overrides the built-in table (e.g. annotations from a word pack)."""
+    categories = categories or {}
+    return {w.lower(): word_meta(w, categories.get(w.lower())) for w in words}
+
+
+TIER_COUNT = 3  # the vowel-count tier is skipped for short words, but still counts for pacing
+
+
+def _tiers(meta: WordMeta):
+    # At most one letter is ever given away for free (the `\p1` perk reveals two).
+    tiers = [
+        f"Intel: {CATEGORY_LABELS[meta.category]}, {meta.length} characters.",
+        f"Signal starts with `{meta.first.upper()}`, ~{meta.syllables} syllable{'s' if meta.syllables != 1 else ''}.",
+    ]
+    if meta.length > 4:
+        tiers.append(f"Vowel count: {meta.vowels}.")
+    return tiers
+
+
+def local_hint(meta: WordMeta, tries_left: int, max_tries: int = 3) -> str:
+    """Hint text that gets more specific as tries run out.
+
+    The first wrong guess unlocks the broad tiers; the last attempt always
+    has every tier revealed.
+    """
+    tiers = _tiers(meta)
+    wrong = max(1, max_tries - max(0, tries_left))
+    steps = max(1, max_tries - 1)
+    shown = min(len(tiers), math.ceil(TIER_COUNT * wrong / steps))
+    return " ".join(tiers[:shown])
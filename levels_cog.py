@@ -1,35 +1,55 @@
 import asyncio
+import json
+import os
 import time
 from types import SimpleNamespace
 from typing import Tuple, Optional, List
 import aiosqlite
 import discord
 from discord.ext import commands
+# XP thresholds, hack XP/speed bonus and the p3 cooldown are game rules and live in game_engine
+from game_engine import OUTCOMES, hack_xp, level_for_xp, p3_cooldown_left
+from profiler import timed
 
 DB_PATH = "levels.sqlite3"
 
-# XP thresholds → levels (0–4)
-# tweak as you like
-LEVEL_THRESHOLDS = [0, 50, 150, 300, 600]  # xp required to be >= this to reach that level index
-
 DAILY_BONUS_XP = 10
 DAILY_BONUS_COOLDOWN = 20 * 60 * 60  # 20 hours
 
-# Hack success base XP
-EASY_BASE_XP = 8
-HARD_BASE_XP = 15
-
-# Speed bonus caps
-EASY_BEST_SECONDS = 25
-HARD_BEST_SECONDS = 40
-SPEED_BONUS_MAX = 10  # extra XP at best times
-
-# Perk/cooldown
-P3_COOLDOWN_SECONDS = 24 * 60 * 60  # once per day
+# Hack attempt history (append-only log, written in batches)
+ATTEMPT_FLUSH_BATCH = 25        # flush once this many attempts are buffered
+ATTEMPT_FLUSH_INTERVAL = 30     # ...or at least this often (seconds)
+SOLVE_TIME_BUCKET_CAP = 300     # solve-time histogram: 1s buckets, last one is overflow
+
+STATS_COLUMNS = "attempts, successes, fails, timeouts, aborts, best_time, time_hist"
+
+# Background SQLite maintenance (runs only when the DB has been write-idle)
+MAINT_TICK_SECONDS = 60          # how often the scheduler wakes up
+MAINT_IDLE_SECONDS = 15          # no writes for this long => low-traffic window
+WAL_TRUNCATE_BYTES = 16 * 1024 * 1024  # WAL larger than this gets a TRUNCATE checkpoint at the next idle window
+VACUUM_STEP_PAGES = 200          # pages freed per incremental_vacuum step
+VACUUM_STEP_PAUSE = 0.05         # seconds between steps, so XP writes can interleave
+# task -> minimum seconds between runs (order = run order within one window)
+MAINT_SCHEDULE = {
+    "checkpoint_passive": 5 * 60,
+    "checkpoint_truncate": 60 * 60,
+    "optimize": 6 * 60 * 60,
+    "analyze": 24 * 60 * 60,
+    "incremental_vacuum": 60 * 60,
+}
 
 class UserStore:
     def __init__(self, db: aiosqlite.Connection):
         self.db = db
+        self.last_write = 0.0  # monotonic time of the last commit (maintenance idle detection)
+        # The connection is shared, so a commit from one coroutine would also commit another's
+        # half-written transaction. Every write+commit sequence holds this lock.
+        self.write_lock = asyncio.Lock()
+
+    @timed
+    async def commit(self):
+        await self.db.commit()
+        self.last_write = time.monotonic()
 
     async def init_tables(self):
         await self.db.execute("""
@@ -48,8 +68,50 @@ class UserStore:
             last_p3_epoch REAL DEFAULT NULL,
             PRIMARY KEY (user_id, guild_id)
         )""")
-        await self.db.commit()
+        await self.db.execute("""
+        CREATE TABLE IF NOT EXISTS hack_attempts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            word TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            outcome TEXT NOT NULL,
+            elapsed_sec REAL,
+            perks_used INTEGER NOT NULL DEFAULT 0,
+            created_epoch REAL NOT NULL
+        )""")
+        # Aggregates below are maintained incrementally on every flush; never rebuilt from hack_attempts.
+        await self.db.execute("""
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            successes INTEGER NOT NULL DEFAULT 0,
+            fails INTEGER NOT NULL DEFAULT 0,
+            timeouts INTEGER NOT NULL DEFAULT 0,
+            aborts INTEGER NOT NULL DEFAULT 0,
+            best_time REAL DEFAULT NULL,
+            time_hist TEXT NOT NULL DEFAULT '{}',
+            cur_streak INTEGER NOT NULL DEFAULT 0,
+            best_streak INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, guild_id)
+        )""")
+        await self.db.execute("""
+        CREATE TABLE IF NOT EXISTS word_stats (
+            word TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            successes INTEGER NOT NULL DEFAULT 0,
+            fails INTEGER NOT NULL DEFAULT 0,
+            timeouts INTEGER NOT NULL DEFAULT 0,
+            aborts INTEGER NOT NULL DEFAULT 0,
+            best_time REAL DEFAULT NULL,
+            time_hist TEXT NOT NULL DEFAULT '{}',
+            PRIMARY KEY (word, difficulty)
+        )""")
+        await self.commit()
 
+    @timed
     async def get_or_create_user(self, user_id: int, guild_id: int) -> SimpleNamespace:
         cur = await self.db.execute(
             "SELECT xp, level, last_login_epoch FROM users WHERE user_id=? AND guild_id=?",
@@ -60,32 +122,32 @@ class UserStore:
         if row:
             xp, level, last_login = row
             return SimpleNamespace(user_id=user_id, guild_id=guild_id, xp=int(xp), level=int(level), last_login_epoch=last_login)
-        await self.db.execute(
-            "INSERT INTO users (user_id, guild_id, xp, level, last_login_epoch) VALUES (?,?,?,?,?)",
-            (int(user_id), int(guild_id), 0, 0, None)
-        )
-        await self.db.commit()
+        async with self.write_lock:
+            await self.db.execute(
+                "INSERT INTO users (user_id, guild_id, xp, level, last_login_epoch) VALUES (?,?,?,?,?)",
+                (int(user_id), int(guild_id), 0, 0, None)
+            )
+            await self.commit()
         return SimpleNamespace(user_id=user_id, guild_id=guild_id, xp=0, level=0, last_login_epoch=None)
 
+    @timed
     async def update_user(self, user_id: int, guild_id: int, *, xp: Optional[int]=None, level: Optional[int]=None, last_login_epoch: Optional[float]=None):
         state = await self.get_or_create_user(user_id, guild_id)
         xp = state.xp if xp is None else int(xp)
         level = state.level if level is None else int(level)
         last_login_epoch = state.last_login_epoch if last_login_epoch is None else last_login_epoch
-        await self.db.execute(
-            "UPDATE users SET xp=?, level=?, last_login_epoch=? WHERE user_id=? AND guild_id=?",
-            (xp, level, last_login_epoch, int(user_id), int(guild_id))
-        )
-        await self.db.commit()
-
+        async with self.write_lock:
+            await self.db.execute(
+                "UPDATE users SET xp=?, level=?, last_login_epoch=? WHERE user_id=? AND guild_id=?",
+                (xp, level, last_login_epoch, int(user_id), int(guild_id))
+            )
+            await self.commit()
+
+    @timed
     async def recompute_level(self, xp: int) -> int:
-        lvl = 0
-        for i, threshold in enumerate(LEVEL_THRESHOLDS):
-            if xp >= threshold:
-                lvl = i
-        # clamp to 4
-        return min(lvl, 4)
+        return level_for_xp(xp)
 
+    @timed
     async def top_users(self, guild_id: int, limit: int = 10) -> List[SimpleNamespace]:
         cur = await self.db.execute(
             "SELECT user_id, xp, level FROM users WHERE guild_id=? ORDER BY xp DESC, level DESC LIMIT ?",
@@ -99,6 +161,7 @@ class UserStore:
         return out
 
     # Perk p3 meta
+    @timed
     async def get_last_p3(self, user_id: int, guild_id: int) -> Optional[float]:
         cur = await self.db.execute("SELECT last_p3_epoch FROM perk_meta WHERE user_id=? AND guild_id=?", (int(user_id), int(guild_id)))
         row = await cur.fetchone()
@@ -107,13 +170,153 @@ class UserStore:
             return row[0]
         return None
 
+    @timed
     async def set_last_p3(self, user_id: int, guild_id: int, when: float):
+        async with self.write_lock:
+            await self.db.execute(
+                "INSERT INTO perk_meta (user_id, guild_id, last_p3_epoch) VALUES (?,?,?) "
+                "ON CONFLICT(user_id, guild_id) DO UPDATE SET last_p3_epoch=excluded.last_p3_epoch",
+                (int(user_id), int(guild_id), float(when))
+            )
+            await self.commit()
+
+    # Hack attempt history + aggregates
+    @timed
+    async def insert_attempts(self, rows: List[tuple]):
+        await self.db.executemany(
+            "INSERT INTO hack_attempts (user_id, guild_id, word, difficulty, outcome, elapsed_sec, perks_used, created_epoch) "
+            "VALUES (?,?,?,?,?,?,?,?)",
+            rows
+        )
+
+    @timed
+    async def get_user_stats(self, user_id: int, guild_id: int) -> Optional[SimpleNamespace]:
+        cur = await self.db.execute(
+            f"SELECT {STATS_COLUMNS}, cur_streak, best_streak FROM user_stats WHERE user_id=? AND guild_id=?",
+            (int(user_id), int(guild_id))
+        )
+        row = await cur.fetchone()
+        await cur.close()
+        if not row:
+            return None
+        return _stats_from_row(row, streaks=True)
+
+    @timed
+    async def put_user_stats(self, user_id: int, guild_id: int, st: SimpleNamespace):
         await self.db.execute(
-            "INSERT INTO perk_meta (user_id, guild_id, last_p3_epoch) VALUES (?,?,?) "
-            "ON CONFLICT(user_id, guild_id) DO UPDATE SET last_p3_epoch=excluded.last_p3_epoch",
-            (int(user_id), int(guild_id), float(when))
+            f"INSERT OR REPLACE INTO user_stats (user_id, guild_id, {STATS_COLUMNS}, cur_streak, best_streak) "
+            "VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+            (int(user_id), int(guild_id), *_stats_to_row(st), st.cur_streak, st.best_streak)
         )
-        await self.db.commit()
+
+    @timed
+    async def get_word_stats(self, word: str, difficulty: str) -> Optional[SimpleNamespace]:
+        cur = await self.db.execute(
+            f"SELECT {STATS_COLUMNS} FROM word_stats WHERE word=? AND difficulty=?",
+            (word, difficulty)
+        )
+        row = await cur.fetchone()
+        await cur.close()
+        if not row:
+            return None
+        return _stats_from_row(row)
+
+    @timed
+    async def put_word_stats(self, word: str, difficulty: str, st: SimpleNamespace):
+        await self.db.execute(
+            f"INSERT OR REPLACE INTO word_stats (word, difficulty, {STATS_COLUMNS}) VALUES (?,?,?,?,?,?,?,?,?)",
+            (word, difficulty, *_stats_to_row(st))
+        )
+
+    @timed
+    async def word_report(self, *, hardest: bool = True, limit: int = 10, min_attempts: int = 3) -> List[SimpleNamespace]:
+        """Words ranked by solve rate (aborts excluded)."""
+        order = "ASC" if hardest else "DESC"
+        cur = await self.db.execute(
+            f"SELECT word, difficulty, {STATS_COLUMNS} FROM word_stats "
+            "WHERE successes + fails + timeouts >= ? "
+            f"ORDER BY CAST(successes AS REAL) / (successes + fails + timeouts) {order}, attempts DESC LIMIT ?",
+            (int(min_attempts), int(limit))
+        )
+        rows = await cur.fetchall()
+        await cur.close()
+        out = []
+        for row in rows:
+            st = _stats_from_row(row[2:])
+            st.word, st.difficulty = row[0], row[1]
+            out.append(st)
+        return out
+
+
+def _decided(st: SimpleNamespace) -> int:
+    return st.successes + st.fails + st.timeouts
+
+def rank_words(rows: List[SimpleNamespace], *, hardest: bool, limit: int, min_attempts: int = 3) -> List[SimpleNamespace]:
+    """Same ordering as UserStore.word_report, for rows merged in memory."""
+    rows = [st for st in rows if _decided(st) >= min_attempts]
+    rows.sort(key=lambda st: (solve_rate(st) if hardest else -solve_rate(st), -st.attempts))
+    return rows[:limit]
+
+
+# ---------- Attempt aggregates (pure helpers) ----------
+
+def _empty_stats(streaks: bool = False) -> SimpleNamespace:
+    st = SimpleNamespace(attempts=0, successes=0, fails=0, timeouts=0, aborts=0, best_time=None, time_hist={})
+    if streaks:
+        st.cur_streak, st.best_streak = 0, 0
+    return st
+
+def _stats_from_row(row, streaks: bool = False) -> SimpleNamespace:
+    attempts, successes, fails, timeouts, aborts, best_time, hist = row[:7]
+    st = SimpleNamespace(
+        attempts=int(attempts), successes=int(successes), fails=int(fails), timeouts=int(timeouts),
+        aborts=int(aborts), best_time=best_time,
+        time_hist={int(k): int(v) for k, v in json.loads(hist or "{}").items()},
+    )
+    if streaks:
+        st.cur_streak, st.best_streak = int(row[7]), int(row[8])
+    return st
+
+def _stats_to_row(st: SimpleNamespace) -> tuple:
+    hist = json.dumps({str(k): v for k, v in sorted(st.time_hist.items())}, separators=(",", ":"))
+    return (st.attempts, st.successes, st.fails, st.timeouts, st.aborts, st.best_time, hist)
+
+def _merge_attempt(st: SimpleNamespace, outcome: str, elapsed_sec: Optional[float]):
+    """Fold one attempt into an aggregate record in place."""
+    st.attempts += 1
+    if outcome == "success":
+        st.successes += 1
+        if elapsed_sec is not None:
+            t = float(elapsed_sec)
+            st.best_time = t if st.best_time is None else min(float(st.best_time), t)
+            bucket = min(int(t), SOLVE_TIME_BUCKET_CAP)
+            st.time_hist[bucket] = st.time_hist.get(bucket, 0) + 1
+    elif outcome == "fail":
+        st.fails += 1
+    elif outcome == "timeout":
+        st.timeouts += 1
+    else:
+        st.aborts += 1
+    if hasattr(st, "cur_streak"):
+        st.cur_streak = st.cur_streak + 1 if outcome == "success" else 0
+        st.best_streak = max(st.best_streak, st.cur_streak)
+
+def solve_rate(st: SimpleNamespace) -> float:
+    decided = st.successes + st.fails + st.timeouts
+    return st.successes / decided if decided else 0.0
+
+def median_time(st: SimpleNamespace) -> Optional[float]:
+    """Median solve time from the bounded histogram (1s resolution)."""
+    total = sum(st.time_hist.values())
+    if not total:
+        return None
+    mid = (total + 1) // 2
+    seen = 0
+    for bucket in sorted(st.time_hist):
+        seen += st.time_hist[bucket]
+        if seen >= mid:
+            return float(bucket)
+    return None
 
 
 class LevelsCog(commands.Cog):
@@ -121,16 +324,37 @@ class LevelsCog(commands.Cog):
         self.bot = bot
         self.db: aiosqlite.Connection = None  # type: ignore
         self.store: UserStore = None  # type: ignore
+        self._attempt_buffer: List[tuple] = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._maint_task: Optional[asyncio.Task] = None
+        self._maint_lock = asyncio.Lock()
+        self._maint_last = {}   # task -> monotonic time of last run
+        self.maint_report = {}  # task -> SimpleNamespace(when, duration_ms, result)
 
     async def cog_load(self):
         self.db = await aiosqlite.connect(DB_PATH)
+        # only takes effect on a fresh file; existing DBs are converted once by the maintenance task
+        await self.db.execute("PRAGMA auto_vacuum=INCREMENTAL;")
         await self.db.execute("PRAGMA journal_mode=WAL;")
         await self.db.execute("PRAGMA synchronous=NORMAL;")
         self.store = UserStore(self.db)
         await self.store.init_tables()
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        # heavy tasks wait a full interval after startup; the passive checkpoint may run at the first idle tick
+        now = time.monotonic()
+        self._maint_last = {task: now for task in MAINT_SCHEDULE if task != "checkpoint_passive"}
+        self._maint_task = asyncio.create_task(self._maintenance_loop())
 
     async def cog_unload(self):
+        # cancel the timer only between flushes, so a batch is never cut off mid-write
+        async with self._flush_lock:
+            for task in (self._flush_task, self._maint_task):
+                if task:
+                    task.cancel()
+        await asyncio.gather(*(t for t in (self._flush_task, self._maint_task) if t), return_exceptions=True)
         if self.db:
+            await self.flush_attempts()
             await self.db.close()
 
     # ---------- XP/Level Logic ----------
@@ -152,17 +376,7 @@ class LevelsCog(commands.Cog):
 
     async def record_hack_success(self, member: discord.Member, *, difficulty: str, duration_sec: float):
         """Award XP for a successful hack. Returns (state, applied_xp, leveled, note)."""
-        base = EASY_BASE_XP if difficulty == "easy" else HARD_BASE_XP
-        best = EASY_BEST_SECONDS if difficulty == "easy" else HARD_BEST_SECONDS
-
-        # Simple linear speed bonus: if you solve in <= best sec, +SPEED_BONUS_MAX; linearly down to +0 at 2*best
-        bonus = 0
-        if duration_sec <= 2 * best:
-            # map [2*best .. best] -> [0 .. SPEED_BONUS_MAX]
-            ratio = max(0.0, min(1.0, (2 * best - duration_sec) / best))
-            bonus = int(round(SPEED_BONUS_MAX * ratio))
-
-        applied = base + bonus
+        applied, bonus = hack_xp(difficulty, duration_sec)
         note = f"(+{bonus} speed bonus)" if bonus > 0 else ""
 
         st = await self.store.get_or_create_user(member.id, member.guild.id)
@@ -182,17 +396,192 @@ class LevelsCog(commands.Cog):
         st.xp, st.level = new_xp, new_level
         return st
 
+# ---------- Hack Attempt History ----------
+
+    async def record_attempt(self, member: discord.Member, *, word: str, difficulty: str, outcome: str,
+                             elapsed_sec: Optional[float], perks_used: int = 0):
+        """Buffer one finished hack; written (with aggregates) in the next batch."""
+        if outcome not in OUTCOMES:
+            raise ValueError(f"unknown outcome: {outcome}")
+        self._attempt_buffer.append((
+            int(member.id), int(member.guild.id), word, difficulty or "easy", outcome,
+            None if elapsed_sec is None else float(elapsed_sec), int(perks_used), time.time()
+        ))
+        if len(self._attempt_buffer) >= ATTEMPT_FLUSH_BATCH:
+            try:
+                await self.flush_attempts()
+            except Exception as e:
+                # the batch stays buffered; the timer retries it
+                print("[LevelsCog] attempt flush failed:", e)
+
+    async def flush_attempts(self):
+        """Append buffered attempts and fold them into user/word aggregates in one transaction."""
+        async with self._flush_lock:
+            batch, self._attempt_buffer = self._attempt_buffer, []
+            if not batch:
+                return
+            try:
+                # 1) reads: current aggregates for every key in the batch, merged in memory
+                users, words = {}, {}
+                for user_id, guild_id, word, difficulty, outcome, elapsed, _, _ in batch:
+                    ukey = (user_id, guild_id)
+                    if ukey not in users:
+                        users[ukey] = await self.store.get_user_stats(user_id, guild_id) or _empty_stats(streaks=True)
+                    _merge_attempt(users[ukey], outcome, elapsed)
+                    wkey = (word, difficulty)
+                    if wkey not in words:
+                        words[wkey] = await self.store.get_word_stats(word, difficulty) or _empty_stats()
+                    _merge_attempt(words[wkey], outcome, elapsed)
+                # 2) writes: raw rows + aggregates, committed together; write_lock keeps other commits out
+                async with self.store.write_lock:
+                    try:
+                        await self.store.insert_attempts(batch)
+                        for (user_id, guild_id), st in users.items():
+                            await self.store.put_user_stats(user_id, guild_id, st)
+                        for (word, difficulty), st in words.items():
+                            await self.store.put_word_stats(word, difficulty, st)
+                        await self.store.commit()
+                    except BaseException:  # includes cancellation mid-write
+                        await self.db.rollback()
+                        raise
+            except BaseException:
+                # keep the batch (ahead of anything buffered meanwhile) for the next flush
+                self._attempt_buffer[:0] = batch
+                raise
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(ATTEMPT_FLUSH_INTERVAL)
+            try:
+                await self.flush_attempts()
+            except Exception as e:
+                print("[LevelsCog] attempt flush failed:", e)
+
+# ---------- SQLite Maintenance ----------
+
+    def wal_size(self) -> int:
+        try:
+            return os.path.getsize(DB_PATH + "-wal")
+        except OSError:
+            return 0
+
+    def _db_idle(self) -> bool:
+        return (time.monotonic() - self.store.last_write >= MAINT_IDLE_SECONDS
+                and not self._attempt_buffer and not self.db.in_transaction)
+
+    async def _pragma(self, sql: str):
+        cur = await self.db.execute(sql)
+        rows = await cur.fetchall()
+        await cur.close()
+        return rows
+
+    def _maint_due(self, task: str, now: float) -> bool:
+        if task == "checkpoint_truncate" and self.wal_size() >= WAL_TRUNCATE_BYTES:
+            return True
+        return now - self._maint_last.get(task, 0.0) >= MAINT_SCHEDULE[task]
+
+    async def _maint_sql(self, sql: str, force: bool):
+        """One maintenance statement under the store's write lock, so it never lands inside
+        an attempt flush or XP write. None (not run) while a transaction is open, or, unless
+        `force`, once traffic has resumed."""
+        async with self.store.write_lock:
+            if self.db.in_transaction or (not force and not self._db_idle()):
+                return None
+            return await self._pragma(sql)
+
+    async def run_maintenance(self, force: bool = False) -> List[str]:
+        """Run whichever maintenance tasks are due, stopping as soon as traffic resumes.
+        `force` runs every task regardless of schedule or traffic (but never inside an
+        open transaction). Returns the tasks run."""
+        ran = []
+        async with self._maint_lock:
+            for task in MAINT_SCHEDULE:
+                now = time.monotonic()
+                if not force and (not self._db_idle() or not self._maint_due(task, now)):
+                    continue
+                started = time.perf_counter()
+                try:
+                    result = await getattr(self, f"_maint_{task}")(force)
+                except Exception as e:
+                    print(f"[LevelsCog/maint] {task} failed:", e)
+                    result = f"failed: {e}"
+                if result is None:
+                    continue  # skipped: writes in flight
+                duration_ms = (time.perf_counter() - started) * 1000.0
+                self._maint_last[task] = time.monotonic()
+                self.maint_report[task] = SimpleNamespace(when=time.time(), duration_ms=duration_ms, result=result)
+                print(f"[LevelsCog/maint] {task}: {result} in {duration_ms:.1f}ms (WAL {self.wal_size()} bytes)")
+                ran.append(task)
+                await asyncio.sleep(0)  # let queued XP writes go first
+        return ran
+
+    async def _maint_checkpoint_passive(self, force: bool) -> Optional[str]:
+        rows = await self._maint_sql("PRAGMA wal_checkpoint(PASSIVE);", force)
+        if rows is None:
+            return None
+        busy, log, done = rows[0]
+        return f"busy={busy} log={log} checkpointed={done}"
+
+    async def _maint_checkpoint_truncate(self, force: bool) -> Optional[str]:
+        rows = await self._maint_sql("PRAGMA wal_checkpoint(TRUNCATE);", force)
+        if rows is None:
+            return None
+        busy, log, done = rows[0]
+        return f"busy={busy} log={log} checkpointed={done}"
+
+    async def _maint_optimize(self, force: bool) -> Optional[str]:
+        return None if await self._maint_sql("PRAGMA optimize;", force) is None else "ok"
+
+    async def _maint_analyze(self, force: bool) -> Optional[str]:
+        return None if await self._maint_sql("ANALYZE;", force) is None else "ok"
+
+    async def _maint_incremental_vacuum(self, force: bool) -> Optional[str]:
+        mode = (await self._pragma("PRAGMA auto_vacuum;"))[0][0]
+        if mode != 2:
+            # converting needs a full VACUUM; that is `\dbstatus convert`, never a scheduled task
+            return "skipped: auto_vacuum not incremental, run `\\dbstatus convert` once"
+        freed = 0
+        while True:
+            free = (await self._pragma("PRAGMA freelist_count;"))[0][0]
+            if free <= 0:
+                break
+            step = min(int(free), VACUUM_STEP_PAGES)
+            # each step takes the write lock on its own; XP writes interleave during the pause
+            if await self._maint_sql(f"PRAGMA incremental_vacuum({step});", force) is None:
+                break
+            freed += step
+            await asyncio.sleep(VACUUM_STEP_PAUSE)
+        return f"freed {freed} pages"
+
+    async def convert_auto_vacuum(self) -> str:
+        """One-time switch of a pre-existing DB to auto_vacuum=INCREMENTAL. Rewrites the whole
+        file on the bot's only connection, so every XP read/write waits until it is done."""
+        async with self._maint_lock, self.store.write_lock:
+            if self.db.in_transaction:
+                return "skipped: a write is in progress, try again"
+            if (await self._pragma("PRAGMA auto_vacuum;"))[0][0] == 2:
+                return "already auto_vacuum=INCREMENTAL"
+            started = time.perf_counter()
+            await self._pragma("PRAGMA auto_vacuum=INCREMENTAL;")
+            await self._pragma("VACUUM;")
+            return f"converted to auto_vacuum=INCREMENTAL in {(time.perf_counter() - started) * 1000.0:.0f}ms"
+
+    async def _maintenance_loop(self):
+        while True:
+            await asyncio.sleep(MAINT_TICK_SECONDS)
+            try:
+                await self.run_maintenance()
+            except Exception as e:
+                print("[LevelsCog] maintenance failed:", e)
+
 # ---------- Perk P3 Daily Cooldown ----------
 
     async def perk_can_use_p3(self, member: discord.Member):
         last = await self.store.get_last_p3(member.id, member.guild.id)
-        now = time.time()
-        if last is None:
+        left = p3_cooldown_left(last, time.time())
+        if left <= 0:
             return True, 0
-        elapsed = now - float(last)
-        if elapsed >= P3_COOLDOWN_SECONDS:
-            return True, 0
-        return False, P3_COOLDOWN_SECONDS - elapsed
+        return False, left
 
     async def perk_mark_p3_used(self, member: discord.Member):
         await self.store.set_last_p3(member.id, member.guild.id, time.time())
@@ -204,6 +593,57 @@ class LevelsCog(commands.Cog):
         st = await self.store.get_or_create_user(ctx.author.id, ctx.guild.id)
         await ctx.send(f"🛰️ **{ctx.author.display_name}** — Level **{st.level}**, XP **{st.xp}**")
 
+    @commands.command(name="stats")
+    async def stats_cmd(self, ctx: commands.Context, member: discord.Member = None):
+        member = member or ctx.author
+        # stored aggregate + not-yet-flushed attempts merged in memory (flushing stays batched)
+        async with self._flush_lock:
+            st = await self.store.get_user_stats(member.id, ctx.guild.id) or _empty_stats(streaks=True)
+            for user_id, guild_id, _, _, outcome, elapsed, _, _ in self._attempt_buffer:
+                if user_id == member.id and guild_id == ctx.guild.id:
+                    _merge_attempt(st, outcome, elapsed)
+        if not st.attempts:
+            return await ctx.send(f"📊 No hack records for **{member.display_name}** yet.")
+        best = f"{st.best_time:.1f}s" if st.best_time is not None else "—"
+        med = median_time(st)
+        med = f"~{med:.0f}s" if med is not None else "—"
+        await ctx.send(
+            f"📊 **{member.display_name}** — {st.attempts} hacks • "
+            f"solve rate **{solve_rate(st):.0%}** ({st.successes}✅ {st.fails}❌ {st.timeouts}⏳ {st.aborts}🛑)\n"
+            f"⏱️ Best {best} • Median {med} • Streak {st.cur_streak} (best {st.best_streak})"
+        )
+
+    @commands.has_guild_permissions(administrator=True)
+    @commands.command(name="wordstats")
+    async def wordstats_cmd(self, ctx: commands.Context, which: str = "hardest", limit: int = 10):
+        which = which.lower()
+        if which not in ("hardest", "easiest"):
+            return await ctx.send("Usage: `\\wordstats [hardest|easiest] [n]`")
+        hardest = which == "hardest"
+        limit = max(1, min(25, int(limit)))
+        async with self._flush_lock:
+            buffered = {(row[2], row[3]) for row in self._attempt_buffer}
+            # each buffered word can push at most one stored word out of the top N, so over-fetch by that many
+            report = await self.store.word_report(hardest=hardest, limit=limit + len(buffered))
+            rows = {(st.word, st.difficulty): st for st in report}
+            # fold in not-yet-flushed attempts; their words may move into (or within) the top N
+            for _, _, word, difficulty, outcome, elapsed, _, _ in self._attempt_buffer:
+                key = (word, difficulty)
+                if key not in rows:
+                    st = await self.store.get_word_stats(word, difficulty) or _empty_stats()
+                    st.word, st.difficulty = word, difficulty
+                    rows[key] = st
+                _merge_attempt(rows[key], outcome, elapsed)
+        rows = rank_words(list(rows.values()), hardest=hardest, limit=limit)
+        if not rows:
+            return await ctx.send("No word records yet.")
+        lines = []
+        for i, st in enumerate(rows, start=1):
+            med = median_time(st)
+            med = f"{med:.0f}s" if med is not None else "—"
+            lines.append(f"{i}. `{st.word}` ({st.difficulty}) — {solve_rate(st):.0%} solved • {st.attempts} tries • median {med}")
+        await ctx.send(f"🧩 **{which.title()} words**\n" + "\n".join(lines))
+
     @commands.command(name="leaderboard")
     async def leaderboard_cmd(self, ctx: commands.Context):
         top = await self.store.top_users(ctx.guild.id, limit=10)
@@ -233,6 +673,30 @@ class LevelsCog(commands.Cog):
         else:
             await ctx.send("Usage: `\\xp add @user <amount>` or `\\xp set @user <amount>`")
 
+    @commands.has_guild_permissions(administrator=True)
+    @commands.command(name="dbstatus")
+    async def dbstatus_cmd(self, ctx: commands.Context, action: str = None):
+        action = (action or "").lower()
+        if action == "run":
+            ran = await self.run_maintenance(force=True)
+            await ctx.send(f"🧰 Maintenance run: {', '.join(ran) or 'nothing'}")
+        elif action == "convert":
+            pages = (await self._pragma("PRAGMA page_count;"))[0][0]
+            await ctx.send(f"⚠️ Rewriting the whole database ({pages} pages) — XP and stats wait until it finishes.")
+            await ctx.send(f"🧰 {await self.convert_auto_vacuum()}")
+            return
+        pages = (await self._pragma("PRAGMA page_count;"))[0][0]
+        free = (await self._pragma("PRAGMA freelist_count;"))[0][0]
+        lines = [f"🗄️ **levels.sqlite3** — WAL {self.wal_size() / 1024:.0f} KiB • {pages} pages ({free} free)"]
+        for task in MAINT_SCHEDULE:
+            rep = self.maint_report.get(task)
+            if rep:
+                ago = int(time.time() - rep.when)
+                lines.append(f"• `{task}` — {rep.duration_ms:.1f}ms, {ago}s ago ({rep.result})")
+            else:
+                lines.append(f"• `{task}` — not run yet")
+        await ctx.send("\n".join(lines))
+
     @commands.has_guild_permissions(administrator=True)
     @commands.command(name="level")
     async def level_admin(self, ctx: commands.Context, action: str, member: discord.Member, amount: int):
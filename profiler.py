@@ -0,0 +1,199 @@
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# Low-overhead wall-clock sampling profiler for the live bot.
+#
+# A daemon thread snapshots every other thread's Python stack via
+# sys._current_frames() at a fixed interval. The event-loop thread's stack
+# includes the running coroutine chain, so samples land on shell_cmd,
+# rce_cmd, LevelsCog queries etc. directly. Output is Brendan Gregg's
+# collapsed-stack format (`root;...;leaf count`), ready for flamegraph.pl or
+# speedscope. Command wall times (including time spent awaiting) are
+# collected separately via `command_started` / `command_finished`, and awaited
+# calls whose work happens off the loop's stack (Subnet relay, SQLite queries on
+# aiosqlite's thread) via `@timed` spans.
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Leaf frames of threads that are just waiting for work: the event loop's
+# selector, idle executor workers, aiosqlite's queue. Left out of the summary.
+IDLE_LEAVES = {
+    "select (selectors.py)",
+    "_worker (thread.py)",
+    "_connection_worker_thread (core.py)",
+    "wait (threading.py)",
+    "get (queue.py)",
+}
+
+_active: Optional["SamplingProfiler"] = None  # the running profiler, if any (read by span/timed)
+
+
+@contextmanager
+def span(name: str):
+    """Record the wall time of the enclosed block on the running profiler; no-op otherwise."""
+    prof = _active
+    if prof is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        prof.span_times[name].append(time.perf_counter() - t0)
+
+
+def timed(fn):
+    """Decorator: time every call of an async function as a span named after it."""
+    name = fn.__qualname__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        with span(name):
+            return await fn(*args, **kwargs)
+    return wrapper
+
+
+@lru_cache(maxsize=1024)
+def _is_project_file(filename: str) -> bool:
+    if filename == os.path.basename(__file__):
+        return False
+    return filename.endswith(".py") and os.path.exists(os.path.join(PROJECT_DIR, filename))
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)})"
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self.command_times: Dict[str, List[float]] = defaultdict(list)
+        self.span_times: Dict[str, List[float]] = defaultdict(list)
+        self._inflight: Dict[int, Tuple[str, float]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        global _active
+        if self.running:
+            raise RuntimeError("profiler already running")
+        _active = self
+        self._stop.clear()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample_loop, name="bot-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        global _active
+        if _active is self:
+            _active = None
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.stopped_at = time.perf_counter()
+
+    def _sample_loop(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < self.max_depth:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(tid, f"thread-{tid}"))
+                labels.reverse()
+                self.stacks[";".join(labels)] += 1
+            self.samples += 1
+
+    # ---------- command wall times ----------
+
+    def command_started(self, key: int, name: str):
+        self._inflight[key] = (name, time.perf_counter())
+
+    def command_finished(self, key: int):
+        entry = self._inflight.pop(key, None)
+        if entry:
+            name, t0 = entry
+            self.command_times[name].append(time.perf_counter() - t0)
+
+    # ---------- output ----------
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+    def write_collapsed(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        return path
+
+    def busy_stacks(self):
+        """(stack, count) pairs whose leaf is doing work rather than waiting for it."""
+        return [(stack, count) for stack, count in self.stacks.items()
+                if stack.rsplit(";", 1)[-1] not in IDLE_LEAVES]
+
+    def top_functions(self, n: int = 10, project_only: bool = True):
+        """Inclusive sample counts per function (counted once per busy stack)."""
+        inclusive = Counter()
+        for stack, count in self.busy_stacks():
+            for label in set(stack.split(";")[1:]):
+                if project_only and not self._is_project(label):
+                    continue
+                inclusive[label] += count
+        return inclusive.most_common(n)
+
+    def top_leaves(self, n: int = 10):
+        leaves = Counter()
+        for stack, count in self.busy_stacks():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(n)
+
+    @staticmethod
+    def _is_project(label: str) -> bool:
+        return _is_project_file(label.rsplit("(", 1)[-1].rstrip(")"))
+
+    def summary(self, n: int = 8) -> str:
+        end = self.stopped_at or time.perf_counter()
+        span = end - (self.started_at or end)
+        all_stacks = sum(self.stacks.values())
+        busy = sum(count for _, count in self.busy_stacks())
+        total_stacks = busy or 1
+        lines = [f"{self.samples} sample rounds over {span:.1f}s (every {self.interval * 1000:.0f}ms), "
+                 f"{(all_stacks - busy) / (all_stacks or 1):.0%} of thread samples idle"]
+        for title, table in (("Commands", self.command_times), ("Awaited calls", self.span_times)):
+            if not table:
+                continue
+            lines.append(f"{title} (wall time):")
+            rows = sorted(table.items(), key=lambda kv: -sum(kv[1]))
+            for name, times in rows[:n]:
+                lines.append(f"  {name:<28} n={len(times):<4} total={sum(times) * 1000:8.1f}ms  "
+                             f"max={max(times) * 1000:7.1f}ms")
+        lines.append("Hot bot functions (inclusive % of busy thread samples):")
+        for label, count in self.top_functions(n):
+            lines.append(f"  {count / total_stacks:6.1%}  {label}")
+        lines.append("Hottest leaves:")
+        for label, count in self.top_leaves(n):
+            lines.append(f"  {count / total_stacks:6.1%}  {label}")
+        return "\n".join(lines)
@@ -0,0 +1,95 @@
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional, Tuple
+
+# Bucket state is kept as a plain (tokens, last_refill) tuple per key so that
+# thousands of idle users cost a couple of floats each. A bucket that has been
+# idle long enough to refill completely is indistinguishable from a missing one,
+# so those entries are swept out (TTL eviction) without changing behaviour.
+
+
+class TokenBucketLimiter:
+    """Per-user / per-guild token buckets, grouped into named budgets.
+
+    `limits` maps a budget name (e.g. "cmd", "llm") to a dict with optional
+    "user" and "guild" entries, each a (capacity, refill_per_sec) pair.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, Tuple[float, float]]],
+                 clock: Callable[[], float] = time.monotonic, sweep_every: float = 60.0):
+        self.limits = limits
+        self.clock = clock
+        self.sweep_every = sweep_every
+        self._state: Dict[Tuple[str, str, int], Tuple[float, float]] = {}
+        self._last_sweep = clock()
+        self.rejections: Counter = Counter()  # (budget, scope) -> count
+        self.allowed: Counter = Counter()     # budget -> count
+
+    def _spec(self, budget: str, scope: str) -> Optional[Tuple[float, float]]:
+        return self.limits.get(budget, {}).get(scope)
+
+    def _level(self, key, spec, now) -> float:
+        capacity, rate = spec
+        entry = self._state.get(key)
+        if entry is None:
+            return float(capacity)
+        tokens, stamp = entry
+        return min(float(capacity), tokens + (now - stamp) * rate)
+
+    def try_acquire(self, budget: str, user_id: Optional[int], guild_id: Optional[int], cost: float = 1.0):
+        """Take `cost` tokens from every applicable bucket, or none of them.
+
+        Returns (allowed, retry_after_sec, scope_that_rejected).
+        """
+        now = self.clock()
+        self._maybe_sweep(now)
+
+        targets = []
+        for scope, ident in (("user", user_id), ("guild", guild_id)):
+            spec = self._spec(budget, scope)
+            if spec is None or ident is None:
+                continue
+            key = (budget, scope, int(ident))
+            targets.append((key, spec, self._level(key, spec, now)))
+
+        for key, spec, level in targets:
+            if level < cost:
+                _, rate = spec
+                retry = (cost - level) / rate if rate > 0 else float("inf")
+                self.rejections[(budget, key[1])] += 1
+                return False, retry, key[1]
+
+        for key, spec, level in targets:
+            self._state[key] = (level - cost, now)
+        self.allowed[budget] += 1
+        return True, 0.0, None
+
+    def _ttl(self) -> float:
+        ttl = 0.0
+        for scopes in self.limits.values():
+            for capacity, rate in scopes.values():
+                if rate > 0:
+                    ttl = max(ttl, capacity / rate)
+        return ttl
+
+    def _maybe_sweep(self, now: float):
+        if now - self._last_sweep < self.sweep_every:
+            return
+        self._last_sweep = now
+        self.evict_idle(now)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drop buckets that have had time to refill completely. Returns count evicted."""
+        now = self.clock() if now is None else now
+        ttl = self._ttl()
+        stale = [k for k, (_, stamp) in self._state.items() if now - stamp >= ttl]
+        for k in stale:
+            del self._state[k]
+        return len(stale)
+
+    def stats(self) -> dict:
+        return {
+            "tracked_buckets": len(self._state),
+            "allowed": dict(self.allowed),
+            "rejections": {f"{b}/{s}": n for (b, s), n in sorted(self.rejections.items())},
+        }
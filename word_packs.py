@@ -0,0 +1,120 @@
+import json
+import os
+import random
+import re
+from collections import deque
+from typing import Dict, List, Tuple
+
+from hints import CATEGORY_LABELS, build_index
+
+# Word packs live in WORDPACK_DIR as `<name>.txt`:
+#
+#   # comment
+#   [easy]
+#   aurora mustang gladius:ship ...
+#   [hard]
+#   caterpillar starfarer ...
+#
+# Words are whitespace-separated, lowercase letters/digits; `word:category`
+# overrides the hint category. Everything a pack needs at runtime (word lists,
+# hint index, shuffled rotation queues) is built by `load_pack`, which is pure
+# and safe to run in a worker thread.
+
+WORDPACK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wordpacks")
+GUILD_PACKS_FILE = os.path.join(WORDPACK_DIR, "guilds.json")
+DEFAULT_PACK = "default"
+MIN_PACK_WORDS = 10  # per section
+
+SECTIONS = ("easy", "hard")
+_WORD_RE = re.compile(r"^[a-z0-9]{2,24}$")
+_NAME_RE = re.compile(r"^[a-z0-9_-]{1,32}$")
+
+
+class WordPackError(ValueError):
+    pass
+
+
+class WordPack:
+    """Immutable word lists + hint index, plus the pack's own rotation queues."""
+
+    def __init__(self, name: str, easy: List[str], hard: List[str], categories: Dict[str, str]):
+        self.name = name
+        self.easy = easy
+        self.hard = hard
+        self.meta = build_index(easy + hard, categories)
+        self.easy_queue = deque(random.sample(easy, len(easy)))
+        self.hard_queue = deque(random.sample(hard, len(hard)))
+
+
+def parse_pack(text: str, name: str = "?") -> Tuple[List[str], List[str], Dict[str, str]]:
+    """Parse and validate pack text. Raises WordPackError with a line number on bad input."""
+    lists = {sec: [] for sec in SECTIONS}
+    categories = {}
+    section = None
+    for lineno, raw in enumerate(text.splitlines(), start=1):
+        line = raw.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            section = line[1:-1].strip().lower()
+            if section not in lists:
+                raise WordPackError(f"{name}:{lineno}: unknown section [{section}]")
+            continue
+        if section is None:
+            raise WordPackError(f"{name}:{lineno}: word outside [easy]/[hard] section")
+        for token in line.split():
+            word, _, category = token.lower().partition(":")
+            if not _WORD_RE.match(word):
+                raise WordPackError(f"{name}:{lineno}: invalid word '{word}'")
+            if category:
+                if category not in CATEGORY_LABELS:
+                    raise WordPackError(f"{name}:{lineno}: unknown category '{category}'")
+                categories[word] = category
+            if word in lists[section]:
+                raise WordPackError(f"{name}:{lineno}: duplicate word '{word}' in [{section}]")
+            lists[section].append(word)
+    for sec in SECTIONS:
+        if len(lists[sec]) < MIN_PACK_WORDS:
+            raise WordPackError(f"{name}: [{sec}] needs at least {MIN_PACK_WORDS} words (has {len(lists[sec])})")
+    return lists["easy"], lists["hard"], categories
+
+
+def pack_path(name: str) -> str:
+    if not _NAME_RE.match(name):
+        raise WordPackError(f"invalid pack name '{name}'")
+    return os.path.join(WORDPACK_DIR, f"{name}.txt")
+
+
+def available_packs() -> List[str]:
+    try:
+        files = os.listdir(WORDPACK_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted(f[:-4] for f in files if f.endswith(".txt") and _NAME_RE.match(f[:-4]))
+
+
+def load_pack(name: str) -> WordPack:
+    """Read, validate and fully build a pack (blocking; run via asyncio.to_thread on a live bot)."""
+    path = pack_path(name)
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+    except OSError as e:
+        raise WordPackError(f"cannot read pack '{name}': {e}") from e
+    easy, hard, categories = parse_pack(text, name)
+    return WordPack(name, easy, hard, categories)
+
+
+def load_guild_packs() -> Dict[int, str]:
+    try:
+        with open(GUILD_PACKS_FILE, encoding="utf-8") as f:
+            return {int(k): str(v) for k, v in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_guild_packs(mapping: Dict[int, str]):
+    tmp = GUILD_PACKS_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({str(k): v for k, v in sorted(mapping.items())}, f, indent=2)
+    os.replace(tmp, GUILD_PACKS_FILE)